@@ -1,19 +1,140 @@
+import dataclasses
+from collections.abc import Iterable, Sequence
 from datetime import datetime
-from typing import Annotated, Any, ClassVar
-
-from beanie import Document, Indexed
-from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+from itertools import islice
+from typing import Any, ClassVar
+
+from beanie import Document
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    PrivateAttr,
+    field_validator,
+    model_validator,
+)
+from pydantic.dataclasses import dataclass
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import BulkWriteError
+
+DUPLICATE_KEY_ERROR = 11000
+
+# Rejects re-imported applications, documents without a publication number are let through
+PUBLICATION_NUMBER_INDEX = IndexModel(
+    [('metadata.publication_number', ASCENDING)],
+    unique=True,
+    partialFilterExpression={'metadata.publication_number': {'$type': 'string'}},
+)
+APPLICATION_NUMBER_INDEX = IndexModel([('metadata.application_number', ASCENDING)], unique=True)
+# Unique indexes enforced while importing, the other indexes only serve reads
+WRITE_INDEXES = (PUBLICATION_NUMBER_INDEX, APPLICATION_NUMBER_INDEX)
+
+
+async def insert_unordered(
+    collection: Any, documents: Sequence[Any]
+) -> tuple[int, list[dict[str, Any]], list[dict[str, Any]]]:
+    """Insert documents with a single unordered insert_many, collecting its write errors.
+
+    Documents that already exist or fail to insert are left out, the others are still
+    inserted. Callers decide whether the remaining failures are raised or logged.
+
+    Args:
+        collection: The Motor collection to insert into.
+        documents: The documents to insert, in their stored shape.
+
+    Returns:
+        tuple[int, list[dict[str, Any]], list[dict[str, Any]]]: The number of inserted
+            documents, then the duplicate key and the other write errors, whose ``index``
+            points into ``documents``.
+    """
+    try:
+        await collection.insert_many(documents, ordered=False, bypass_document_validation=True)
+    except BulkWriteError as e:
+        duplicates: list[dict[str, Any]] = []
+        failures: list[dict[str, Any]] = []
+        for error in e.details.get('writeErrors', []):
+            if error['code'] == DUPLICATE_KEY_ERROR:
+                duplicates.append(error)
+            else:
+                failures.append(error)
+        inserted: int = e.details['nInserted']
+        return inserted, duplicates, failures
+    return len(documents), [], []
+
+
+DATE_FIELDS = (
+    'date_produced',
+    'date_published',
+    'filing_date',
+    'patent_issue_date',
+    'abandon_date',
+)
+
+
+# Fixed-width HUPD date layouts: length, separator offsets, year/month/day slices
+DATE_LAYOUTS = (
+    (8, (), (slice(0, 4), slice(4, 6), slice(6, 8))),  # YYYYMMDD
+    (10, (4, 7), (slice(0, 4), slice(5, 7), slice(8, 10))),  # YYYY-MM-DD
+)
+DATE_FORMATS = ('%Y%m%d', '%Y-%m-%d')
+
+
+def parse_date(value: Any) -> Any:
+    """Convert a HUPD date string to a datetime object, handling empty strings.
+
+    Args:
+        value: Raw date value in ``YYYYMMDD`` or ``YYYY-MM-DD`` format.
+
+    Returns:
+        The parsed datetime, None for empty or unparsable strings, or the value
+        unchanged if it is not a string.
+    """
+    if not isinstance(value, str):
+        return value
+    if not value.strip():
+        return None
+    try:
+        return _parse_fixed_width_date(value) or _parse_formatted_date(value)
+    except ValueError:
+        return None
+
+
+def _parse_fixed_width_date(value: str) -> datetime | None:
+    """Parse a date in one of DATE_LAYOUTS by slicing, which is much cheaper than strptime.
+
+    Raises:
+        ValueError: If the value has a known layout but is not a valid date.
+    """
+    for length, separators, parts in DATE_LAYOUTS:
+        if len(value) != length or any(value[i] != '-' for i in separators):
+            continue
+        if all(value[part].isdigit() for part in parts):
+            year, month, day = (int(value[part]) for part in parts)
+            return datetime(year, month, day)  # noqa: DTZ001
+    return None
+
+
+def _parse_formatted_date(value: str) -> datetime | None:
+    """Parse a date with the first of DATE_FORMATS that matches, e.g. unpadded days."""
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format)  # noqa: DTZ007
+        except ValueError:
+            continue
+    return None
 
 
 class ApplicationMetadata(BaseModel):
     """Core application identification information."""
 
-    application_number: Annotated[str, Indexed(unique=True)]
+    application_number: str
     publication_number: str | None = None
     patent_number: str
     title: str
     decision: str
 
+    model_config = ConfigDict(defer_build=True, frozen=True)
+
 
 class ApplicationDates(BaseModel):
     """All date-related fields."""
@@ -28,40 +149,16 @@ class ApplicationDates(BaseModel):
 
     @model_validator(mode='before')
     @classmethod
-    def convert_date_fields(cls, data: Any) -> Any:  # noqa: C901
+    def convert_date_fields(cls, data: Any) -> Any:
         """Convert string dates to datetime objects, handling empty strings."""
-        date_fields = [
-            'date_produced',
-            'date_published',
-            'filing_date',
-            'patent_issue_date',
-            'abandon_date',
-        ]
-
-        for field in date_fields:
-            if field not in data:
-                continue
-
-            value = data[field]
-            if isinstance(value, str):
-                # Handle empty strings
-                if not value.strip():
-                    data[field] = None
-                else:
-                    try:
-                        # Try parsing YYYYMMDD format
-                        data[field] = datetime.strptime(value, '%Y%m%d')  # noqa: DTZ007
-                    except ValueError:
-                        try:
-                            # Try parsing YYYY-MM-DD format
-                            data[field] = datetime.strptime(value, '%Y-%m-%d')  # noqa: DTZ007
-                        except ValueError:
-                            # Fallback to None if parsing fails
-                            data[field] = None
+        for field in DATE_FIELDS:
+            if field in data:
+                data[field] = parse_date(data[field])
         return data
 
 
-class ClassificationInfo(BaseModel):
+@dataclass(slots=True, frozen=True, config=ConfigDict(defer_build=True))
+class ClassificationInfo:
     """Patent classification systems."""
 
     main_cpc_label: str | None = None
@@ -72,7 +169,8 @@ class ClassificationInfo(BaseModel):
     uspc_subclass: str | None = None
 
 
-class ExaminerInfo(BaseModel):
+@dataclass(slots=True, frozen=True, config=ConfigDict(defer_build=True))
+class ExaminerInfo:
     """Examiner details."""
 
     examiner_id: str
@@ -81,7 +179,8 @@ class ExaminerInfo(BaseModel):
     examiner_name_middle: str | None = None
 
 
-class Inventor(BaseModel):
+@dataclass(slots=True, frozen=True, config=ConfigDict(defer_build=True))
+class Inventor:
     """Individual inventor information."""
 
     inventor_name_last: str
@@ -100,6 +199,8 @@ class PatentContent(BaseModel):
     summary: str
     full_description: str
 
+    model_config = ConfigDict(defer_build=True, frozen=True)
+
 
 class PatentApplication(Document):
     """Full patent application document."""
@@ -113,6 +214,15 @@ class PatentApplication(Document):
 
     model_config = ConfigDict(validate_assignment=True, arbitrary_types_allowed=True)
 
+    # Private so the cached value is neither validated nor encoded with the document
+    _inventor_countries: list[str] | None = PrivateAttr(default=None)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        """Set an attribute, dropping the cached inventor countries with the inventors."""
+        super().__setattr__(name, value)
+        if name == 'inventors':
+            self._inventor_countries = None
+
     @field_validator('inventors', mode='before')
     @classmethod
     def ensure_inventor_list(cls, value: Any) -> list[Inventor]:
@@ -126,9 +236,49 @@ class PatentApplication(Document):
             raise ValueError('Accepted patents cannot have an abandon date')
         return self
 
+    @classmethod
+    async def bulk_insert(
+        cls, documents: Iterable['PatentApplication'], batch_size: int = 1000
+    ) -> int:
+        """Insert documents with one unordered insert_many round-trip per batch.
+
+        Documents that already exist are skipped, the rest of their batch and the
+        following batches are still inserted.
+
+        Args:
+            documents: The patent applications to insert.
+            batch_size: Number of documents sent per insert_many call.
+
+        Returns:
+            int: The number of inserted documents.
+
+        Raises:
+            BulkWriteError: If a document fails to insert for another reason than a
+                duplicate key.
+        """
+        collection = cls.get_motor_collection()
+        documents = iter(documents)
+        inserted = 0
+        while batch := list(islice(documents, batch_size)):
+            batch_inserted, _, failures = await insert_unordered(
+                collection,
+                [document.model_dump(by_alias=True, exclude_none=True) for document in batch],
+            )
+            inserted += batch_inserted
+            if failures:
+                raise BulkWriteError({'nInserted': inserted, 'writeErrors': failures})
+        return inserted
+
     class Settings:
         name = 'applications'
+        # Beanie only encodes pydantic models, the slotted record types are dataclasses
+        bson_encoders: ClassVar = {
+            ClassificationInfo: dataclasses.asdict,
+            ExaminerInfo: dataclasses.asdict,
+            Inventor: dataclasses.asdict,
+        }
         indexes: ClassVar = [
+            *WRITE_INDEXES,
             'dates.filing_date',
             'classification.main_cpc_label',
             'metadata.decision',
@@ -149,5 +299,12 @@ class PatentApplication(Document):
 
     @property
     def inventor_countries(self) -> list[str]:
-        """List of unique countries from all inventors (excluding nulls)."""
-        return list({inv.inventor_country for inv in self.inventors if inv.inventor_country})
+        """List of unique countries from all inventors (excluding nulls).
+
+        Computed once per instance and reset when the inventors are reassigned.
+        """
+        if self._inventor_countries is None:
+            self._inventor_countries = list(
+                {inv.inventor_country for inv in self.inventors if inv.inventor_country}
+            )
+        return self._inventor_countries
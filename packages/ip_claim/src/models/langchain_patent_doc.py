@@ -1,6 +1,6 @@
 from typing import Any
 
-from pydantic import BaseModel, Field, model_validator
+from pydantic import BaseModel, Field, field_validator
 
 
 class LangChainPatentMetadata(BaseModel):
@@ -26,19 +26,17 @@ class LangChainPatentMetadata(BaseModel):
     inventor_count: int
     filing_year: int
 
-    @model_validator(mode='before')
+    @field_validator('cpc_labels', 'ipcr_labels', 'inventor_countries', mode='before')
     @classmethod
-    def handle_null_values(cls, data: Any) -> Any:
-        """Convert None values to appropriate defaults."""
-        if isinstance(data, dict):
-            for field in cls.model_fields:
-                if field in data and data[field] is None:
-                    # Handle different field types
-                    if field in {'cpc_labels', 'ipcr_labels', 'inventor_countries'}:
-                        data[field] = []
-                    elif field == 'inventor_count':
-                        data[field] = 0
-        return data
+    def handle_null_lists(cls, value: Any) -> Any:
+        """Convert None list values to empty lists."""
+        return [] if value is None else value
+
+    @field_validator('inventor_count', mode='before')
+    @classmethod
+    def handle_null_count(cls, value: Any) -> Any:
+        """Convert a None inventor count to zero."""
+        return 0 if value is None else value
 
 
 class LangChainPatentContent(BaseModel):
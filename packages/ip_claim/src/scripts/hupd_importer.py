@@ -1,22 +1,57 @@
 import asyncio
-import json
+import multiprocessing
+import os
+import zlib
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import islice
 from pathlib import Path
+from typing import Any
 
-import aiofiles
+import orjson
 from beanie import init_beanie
+from bson import encode
+from bson.raw_bson import RawBSONDocument
 from loguru import logger
 from motor.motor_asyncio import AsyncIOMotorClient
 from omegaconf import DictConfig, ListConfig, OmegaConf
-from returns.future import FutureResult, future_safe
-from returns.io import IO, IOResult, impure
-
-from models.hupd import (
-    ApplicationDates,
-    ApplicationMetadata,
-    ClassificationInfo,
-    ExaminerInfo,
-    PatentApplication,
-    PatentContent,
+from pymongo import IndexModel
+from pymongo.errors import PyMongoError
+from returns.future import future_safe
+from returns.io import IO, impure
+
+from models.hupd import WRITE_INDEXES, PatentApplication, insert_unordered, parse_date
+
+# HUPD keys copied into each section of a PatentApplication document
+METADATA_KEYS = ('application_number', 'publication_number', 'patent_number', 'title', 'decision')
+DATE_KEYS = (
+    'date_produced',
+    'date_published',
+    'filing_date',
+    'patent_issue_date',
+    'abandon_date',
+)
+CLASSIFICATION_KEYS = (
+    'main_cpc_label',
+    'cpc_labels',
+    'main_ipcr_label',
+    'ipcr_labels',
+    'uspc_class',
+    'uspc_subclass',
+)
+EXAMINER_KEYS = ('examiner_id', 'examiner_name_last', 'examiner_name_first', 'examiner_name_middle')
+CONTENT_KEYS = ('abstract', 'claims', 'background', 'summary', 'full_description')
+# HUPD keys without a default in PatentApplication, files missing one are skipped
+REQUIRED_KEYS = (
+    'application_number',
+    'patent_number',
+    'title',
+    'decision',
+    'examiner_id',
+    'examiner_name_last',
+    'examiner_name_first',
+    *CONTENT_KEYS,
 )
 
 
@@ -31,6 +66,77 @@ def load_config() -> DictConfig | ListConfig:
     )
 
 
+def _iter_json_files(data_dir: str, shard: int = 0, num_shards: int = 1) -> Iterator[Path]:
+    """Lazily yield the JSON files of a directory, or of one shard of it.
+
+    ``os.scandir`` reuses the cached directory entry type, so unlike ``Path.glob``
+    followed by ``is_file`` no extra stat call is made per file. Files are assigned to
+    shards by a CRC32 of their name, which does not depend on the directory listing
+    order, so each worker process can scan the directory itself instead of receiving
+    a file list.
+    """
+    with os.scandir(data_dir) as entries:
+        for entry in entries:
+            if not entry.name.endswith('.json'):
+                continue
+            if num_shards > 1 and zlib.crc32(entry.name.encode()) % num_shards != shard:
+                continue
+            if entry.is_file():
+                yield Path(entry.path)
+
+
+def _build_document(data: Any, file_path: Path) -> RawBSONDocument | None:
+    """Build the encoded PatentApplication document of a parsed HUPD file.
+
+    Pydantic validation is skipped, so files missing a required field or a valid
+    filing date are rejected here rather than breaking readers of the collection.
+
+    Returns:
+        RawBSONDocument | None: The encoded document, or None if the file is skipped.
+    """
+    if not isinstance(data, dict):
+        logger.error(f'Error processing file {file_path}: not a JSON object')
+        return None
+    if not data.get('publication_number'):
+        logger.warning('No publication_number found in {}, skipping.', file_path)
+        return None
+    if missing := [k for k in REQUIRED_KEYS if data.get(k) is None]:
+        logger.warning('Missing {} in {}, skipping.', ', '.join(missing), file_path)
+        return None
+    dates = {k: parse_date(data.get(k)) for k in DATE_KEYS}
+    if not isinstance(dates['filing_date'], datetime):
+        logger.warning('No valid filing_date found in {}, skipping.', file_path)
+        return None
+    return RawBSONDocument(
+        encode(
+            {
+                'metadata': {k: data.get(k) for k in METADATA_KEYS},
+                'dates': dates,
+                'classification': {k: data.get(k) for k in CLASSIFICATION_KEYS},
+                'examiner': {k: data.get(k) for k in EXAMINER_KEYS},
+                'inventor_list': data.get('inventor_list') or [],
+                'content': {k: data.get(k) for k in CONTENT_KEYS},
+            }
+        )
+    )
+
+
+def _import_shard(config: DictConfig | ListConfig, shard: int, num_shards: int) -> tuple[int, int]:
+    """Import one shard of the data directory in a worker process.
+
+    Each worker runs its own event loop and Motor client, sharing the configured
+    connection pool size with the other workers.
+    """
+    config.db.max_pool_size = max(1, config.db.max_pool_size // num_shards)
+    importer = Importer(config)
+
+    async def import_shard() -> tuple[int, int]:
+        (await importer.init_db()).unwrap()
+        return await importer._import_files(shard, num_shards)  # noqa: SLF001
+
+    return asyncio.run(import_shard())
+
+
 class Importer:
     """Class responsible for importing patent data into the database.
 
@@ -41,150 +147,178 @@ class Importer:
     def __init__(self, config: DictConfig | ListConfig):
         """Class constructor."""
         self.config = config
+        # Bound in-flight file reads so large batches don't starve the default thread pool
+        self._read_semaphore = asyncio.Semaphore(config.importer.concurrency)
 
     @future_safe
     async def init_db(self) -> AsyncIOMotorClient[PatentApplication]:
         """Initialize database connection and indexes."""
         config = self.config.db
         client: AsyncIOMotorClient[PatentApplication] = AsyncIOMotorClient(
-            config.uri, maxPoolSize=config.max_pool_size, serverSelectionTimeoutMS=config.timeout_ms
+            config.uri,
+            maxPoolSize=config.max_pool_size,
+            serverSelectionTimeoutMS=config.timeout_ms,
+            w=config.write_concern.w,
+            journal=config.write_concern.journal,
+            compressors=config.compressors,
         )
         await init_beanie(
             database=client[config.db_name],
             document_models=[PatentApplication],
             allow_index_dropping=config.index_options.allow_dropping,
+            skip_indexes=True,
         )
+        self._collection = PatentApplication.get_motor_collection()
         return client
 
-    @staticmethod
-    @future_safe
-    async def _insert_into_db(patent_application: PatentApplication) -> None:
-        await PatentApplication.insert(patent_application)
+    async def process_file(self, file_path: Path) -> RawBSONDocument | None:
+        """Process a single JSON file into a PatentApplication-shaped document.
 
-    @future_safe
-    async def process_file(self, file_path: Path) -> None:
-        """Process a single JSON file and create a PatentApplication object.
+        The HUPD dump is trusted, so the document is built as a plain dict in the
+        stored (aliased) shape of PatentApplication instead of running Pydantic
+        validation for every file. It is encoded to BSON right away, so the encoding
+        happens in the worker process that parsed the file and the batch waiting for
+        insert_many is held as compact bytes.
 
         Args:
             file_path (Path): Path to the JSON file to process.
 
         Returns:
-            PatentApplication: The parsed patent application data.
+            RawBSONDocument | None: The encoded patent application document, or None if the
+                file was skipped or could not be read.
         """
-        async with aiofiles.open(file_path, encoding='utf-8') as f:
-            data = json.loads(await f.read())
-            publication_number = data.get('publication_number')
-            if not publication_number:
-                logger.warning(f'No publication_number found in {file_path}, skipping.')
-                return
-            existing = await PatentApplication.find_one(
-                PatentApplication.metadata.publication_number == publication_number
+        try:
+            async with self._read_semaphore:
+                raw = await asyncio.to_thread(file_path.read_bytes)
+            return _build_document(orjson.loads(raw), file_path)
+        except Exception as e:
+            logger.error(f'Error processing file {file_path}: {e}')
+            return None
+
+    async def _insert_batch(self, documents: list[RawBSONDocument]) -> int:
+        """Insert a batch of patent applications with a single unordered bulk write.
+
+        Returns:
+            int: The number of documents inserted.
+        """
+        if not documents:
+            return 0
+        inserted, duplicates, failures = await insert_unordered(self._collection, documents)
+        for error in duplicates:
+            logger.opt(lazy=True).debug(
+                '⏭️ Patent application {} already exists, skipping.',
+                lambda i=error['index']: documents[i]['metadata']['publication_number'],
             )
-            if existing:
-                logger.info(f'⏭️ Patent application {publication_number} already exists, skipping.')
-                return
-        patent_application = PatentApplication(
-            metadata=ApplicationMetadata(
-                **{
-                    k: data.get(k)
-                    for k in [
-                        'application_number',
-                        'publication_number',
-                        'patent_number',
-                        'title',
-                        'decision',
-                    ]
-                }
-            ),
-            dates=ApplicationDates(
-                **{
-                    k: data.get(k)
-                    for k in [
-                        'date_produced',
-                        'date_published',
-                        'filing_date',
-                        'patent_issue_date',
-                        'abandon_date',
-                    ]
-                }
-            ),
-            classification=ClassificationInfo(
-                **{
-                    k: data.get(k)
-                    for k in [
-                        'main_cpc_label',
-                        'cpc_labels',
-                        'main_ipcr_label',
-                        'ipcr_labels',
-                        'uspc_class',
-                        'uspc_subclass',
-                    ]
-                }
-            ),
-            examiner=ExaminerInfo(
-                **{
-                    k: data.get(k)
-                    for k in [
-                        'examiner_id',
-                        'examiner_name_last',
-                        'examiner_name_first',
-                        'examiner_name_middle',
-                    ]
-                }
-            ),
-            inventors=data.get('inventor_list', []),
-            content=PatentContent(
-                **{
-                    k: data.get(k)
-                    for k in ['abstract', 'claims', 'background', 'summary', 'full_description']
-                }
-            ),
-        )
-        task: FutureResult[None, Exception] = self._insert_into_db(patent_application)
-        result = await task
-        result.alt(lambda e: logger.error(f'Error processing file: {e}'))
-        result.map(lambda _: logger.info(f'✅ Inserted {file_path} documents into the database'))
+        for error in failures:
+            publication_number = documents[error['index']]['metadata']['publication_number']
+            logger.error(f'Error inserting {publication_number}: {error["errmsg"]}')
+        if duplicates:
+            logger.info(f'⏭️ Skipped {len(duplicates)} patent applications that already exist')
+        return inserted
 
-    @staticmethod
-    @future_safe
-    async def _create_indexes() -> None:
-        await PatentApplication.get_motor_collection().create_index(
-            [
-                ('metadata.application_number', 1),
-            ]
-        )
-        await PatentApplication.get_motor_collection().create_index(
-            [
-                ('metadata.publication_number', 'text'),
-            ]
-        )
-        logger.info('✅ Created full-text indexes')
+    async def _create_write_indexes(self) -> None:
+        try:
+            await self._collection.create_indexes(list(WRITE_INDEXES))
+        except PyMongoError as e:
+            logger.error(f'Error creating unique publication and application number indexes: {e}')
+            return
+        logger.info('✅ Created unique publication and application number indexes')
+
+    async def _create_read_indexes(self) -> None:
+        try:
+            await self._collection.create_indexes(
+                [
+                    index if isinstance(index, IndexModel) else IndexModel(index)
+                    for index in PatentApplication.Settings.indexes
+                    if index not in WRITE_INDEXES
+                ]
+            )
+        except PyMongoError as e:
+            logger.error(f'Error creating query indexes: {e}')
+            return
+        logger.info('✅ Created query and full-text indexes')
 
     @future_safe
     async def import_patents(self):
         """Import patent data from JSON files into the database.
 
-        This method reads all JSON files from the specified directory,
-        processes them into PatentApplication objects,
+        This method streams the JSON files from the specified directory in batches,
+        processes them into PatentApplication documents,
         and inserts them into the database.
-        It also creates text indexes on certain fields after the import.
+        Only the unique publication and application number indexes are created before
+        the import, so that documents already in the collection are rejected. Query
+        indexes only serve reads and are built once after the import to keep them off
+        the write path, also when the import fails part way.
         """
         logger.info('Starting patent import process')
+        await self._create_write_indexes()
+        workers = self.config.importer.get('workers') or 1
+        try:
+            if workers > 1:
+                succeeded, failed = await self._import_sharded(workers)
+            else:
+                succeeded, failed = await self._import_files()
+            logger.info(
+                f'Successfully imported {succeeded} patent applications, {failed} not imported'
+            )
+        finally:
+            await self._create_read_indexes()
+
+    async def _import_sharded(self, num_shards: int) -> tuple[int, int]:
+        """Import the data directory split across worker processes.
+
+        JSON decoding and document building are CPU-bound, so each shard runs in its
+        own process to use every core. A failing shard does not stop the others.
+
+        Returns:
+            tuple[int, int]: The number of imported and not imported files.
+
+        Raises:
+            BaseExceptionGroup: The errors of the failed shards, once every shard is done.
+        """
+        logger.info(f'Importing with {num_shards} worker processes')
+        loop = asyncio.get_running_loop()
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(num_shards, mp_context=context) as pool:
+            results = await asyncio.gather(
+                *[
+                    loop.run_in_executor(pool, _import_shard, self.config, shard, num_shards)
+                    for shard in range(num_shards)
+                ],
+                return_exceptions=True,
+            )
+        counts = [result for result in results if not isinstance(result, BaseException)]
+        succeeded = sum(imported for imported, _ in counts)
+        failed = sum(not_imported for _, not_imported in counts)
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            logger.error(
+                f'{len(errors)}/{num_shards} shards failed after importing {succeeded} '
+                f'patent applications, {failed} not imported'
+            )
+            raise BaseExceptionGroup('Failed to import some shards', errors)
+        return succeeded, failed
+
+    async def _import_files(self, shard: int = 0, num_shards: int = 1) -> tuple[int, int]:
+        """Import one shard of the data directory in batches.
+
+        Returns:
+            tuple[int, int]: The number of imported and not imported files.
+        """
         importer = self.config.importer
-        files = [f for f in Path(importer.data_dir).glob('*.json') if f.is_file()]
-        logger.info(f'Found {len(files)} JSON files to import')
+        files = _iter_json_files(importer.data_dir, shard, num_shards)
         step = importer.batch_size
-        results: list[IOResult[PatentApplication, Exception]] = [
-            result
-            for i in range(0, len(files), step)
-            for result in await asyncio.gather(
-                *[self.process_file(file) for file in files[i : i + step]]
+        succeeded = failed = 0
+        while batch_files := list(islice(files, step)):
+            batch = await asyncio.gather(*[self.process_file(file) for file in batch_files])
+            inserted = await self._insert_batch([document for document in batch if document])
+            succeeded += inserted
+            failed += len(batch_files) - inserted
+            logger.info(
+                f'Inserted {inserted}/{len(batch_files)} files of shard {shard} '
+                f'({succeeded} imported, {failed} not imported so far)'
             )
-        ]
-        successful_applications = sum(result.value_or(False) == IO(None) for result in results)
-
-        logger.info(f'Successfully processed {len(successful_applications)} patent applications')
-        await self._create_indexes().alt(logger.error)
+        return succeeded, failed
 
 
 async def main() -> None:
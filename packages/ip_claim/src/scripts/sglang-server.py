@@ -7,10 +7,16 @@ from utils import load_config
 if __name__ == '__main__':
     # os.environ['TOKENIZERS_PARALLELISM'] = 'false'
     config = load_config('./config/sglang.yml')
+    # Boolean flags are only passed when enabled
     cmd_args = ' '.join(
-        [f'--{k} {v}' if not isinstance(v, bool) else f'--{k}' for k, v in config['cmd'].items()]
+        [
+            f'--{k} {v}' if not isinstance(v, bool) else f'--{k}'
+            for k, v in config['cmd'].items()
+            if v is not False
+        ]
     )
     cmd = f'python -m sglang.launch_server {cmd_args}'
+    print_highlight(f'Launching: {cmd}')
     server_process, port = launch_server_cmd(cmd)
 
     wait_for_server(f'http://localhost:{port}')
@@ -1,15 +1,22 @@
 import ast
 import re
+from collections.abc import Callable
 
+import orjson
 from langchain_core.documents import Document as LangChainDocument
 from langchain_text_splitters import (
     NLTKTextSplitter,
     RecursiveCharacterTextSplitter,
     SentenceTransformersTokenTextSplitter,
     SpacyTextSplitter,
+    TextSplitter,
 )
+from langchain_text_splitters.base import Tokenizer, split_text_on_tokens
 from pydantic import BaseModel, Field
 
+# Section split claim by claim, matched case-insensitively since the loader emits 'Claims'
+CLAIMS_SECTION = 'claims'
+
 
 class PatentChunkerConfig(BaseModel):
     """Configuration for patent document chunking."""
@@ -36,7 +43,8 @@ class PatentChunker:
 
     def __init__(self, config: PatentChunkerConfig):
         self.config = config
-        self.claim_delimiter = re.compile(r'(\d+\.\s)')  # Regex to capture claim numbers
+        self.claim_delimiter = re.compile(r'(\d+)\.\s')  # Regex to capture claim numbers
+        self.splitter: TextSplitter
 
         if config.splitter_type == 'spacy':
             self.splitter = SpacyTextSplitter(
@@ -59,81 +67,145 @@ class PatentChunker:
                 chunk_size=config.chunk_size, chunk_overlap=config.chunk_overlap
             )
 
-    def _chunk_claims(self, claims_text: str) -> list[str]:
-        """Split claims section while preserving claim numbers."""
+    def _chunk_claims(self, claims_text: str) -> list[tuple[str, int | None]]:
+        """Split claims section while preserving claim numbers.
+
+        Claims are sliced between delimiter matches found in a single pass, so each
+        chunk carries the claim number of the delimiter that starts it.
+        """
         if not self.config.split_claims:
-            return [claims_text]
+            match = self.claim_delimiter.match(claims_text)
+            return [(claims_text, int(match.group(1)) if match else None)]
 
-        parts = self.claim_delimiter.split(claims_text)
-        if len(parts) < 2:
-            return [claims_text]
+        matches = list(self.claim_delimiter.finditer(claims_text))
+        if not matches:
+            return [(claims_text, None)]
 
-        # Skip initial empty part if exists
-        start_index = 1 if not parts[0] else 0
-        chunks = []
+        bounds = [match.start() for match in matches] + [len(claims_text)]
+        chunks: list[tuple[str, int | None]] = []
+        if preamble := claims_text[: bounds[0]].strip():
+            chunks.append((preamble, None))
 
-        # Recombine claim numbers with their content
-        for i in range(start_index, len(parts), 2):
-            if i + 1 < len(parts) and (chunk := (parts[i] + parts[i + 1]).strip()):
-                chunks.append(chunk)
-            elif parts[i].strip():
-                chunks.append(parts[i].strip())
+        # Slice each claim up to the start of the next claim number
+        for match, end in zip(matches, bounds[1:], strict=True):
+            chunks.append((claims_text[match.start() : end].strip(), int(match.group(1))))
 
         return chunks
 
-    def _chunk_section(self, section_name: str, section_text: str) -> list[str]:
+    def _chunk_section(
+        self, section_name: str, section_text: str, section_splits: dict[str, list[str]]
+    ) -> list[tuple[str, int | None]]:
         """Applies appropriate chunking strategy based on section type."""
-        if section_name == 'claims':
+        if section_name.lower() == CLAIMS_SECTION:
             return self._chunk_claims(section_text)
-        return self.splitter.split_text(section_text)
+        if (splits := section_splits.get(section_text)) is None:
+            splits = self.splitter.split_text(section_text)
+        return [(chunk, None) for chunk in splits]
+
+    def _split_on_tokens(
+        self, splitter: SentenceTransformersTokenTextSplitter, texts: list[str]
+    ) -> dict[str, list[str]]:
+        """Split texts on sentence transformer tokens with a single batched tokenizer call."""
+        tokenizer = splitter.tokenizer
+        input_ids = tokenizer(texts, add_special_tokens=False, truncation='do_not_truncate')[
+            'input_ids'
+        ]
+        return {
+            text: split_text_on_tokens(
+                text=text,
+                tokenizer=Tokenizer(
+                    chunk_overlap=self.config.chunk_overlap,
+                    tokens_per_chunk=splitter.tokens_per_chunk,
+                    decode=tokenizer.decode,
+                    encode=_encoded(ids),
+                ),
+            )
+            for text, ids in zip(texts, input_ids, strict=True)
+        }
 
-    def chunk_document(self, document: LangChainDocument) -> list[LangChainDocument]:
-        """Splits a patent document into chunks preserving structure."""
+    @staticmethod
+    def _parse_content(document: LangChainDocument) -> dict[str, str] | None:
+        """Convert document content back to structured format, None if it is not structured."""
+        content = document.page_content
         try:
-            # Convert document content back to structured format
-            content = (
-                ast.literal_eval(document.page_content)
-                if isinstance(document.page_content, str)
-                else document.page_content
-            )
-        except:
+            parsed = orjson.loads(content)
+        except orjson.JSONDecodeError:
+            try:
+                # Page content serialized as a Python literal
+                parsed = ast.literal_eval(content)
+            except Exception:
+                return None
+        return parsed if isinstance(parsed, dict) else None
+
+    def chunk_document(
+        self,
+        document: LangChainDocument,
+        content: dict[str, str] | None = None,
+        section_splits: dict[str, list[str]] | None = None,
+    ) -> list[LangChainDocument]:
+        """Splits a patent document into chunks preserving structure.
+
+        Args:
+            document: The document to split.
+            content: The already parsed page content, parsed from the document if omitted.
+            section_splits: Precomputed splits of section texts, keyed by section text.
+        """
+        content = content or self._parse_content(document)
+        if content is None:
             # Fallback to text splitting if parsing fails
             return self.splitter.split_documents([document])
 
-        chunks = []
-        metadata = document.metadata.copy()
+        chunks: list[LangChainDocument] = []
+        metadata = document.metadata
+        section_splits = section_splits or {}
 
         # Process each section independently
         for section_name, section_text in content.items():
             if not section_text:
                 continue
 
-            section_chunks = self._chunk_section(section_name, section_text)
-
-            for i, chunk in enumerate(section_chunks):
-                chunk_metadata = metadata.copy()
-                chunk_metadata.update(
-                    {
-                        'section': section_name,
-                        'chunk_index': i,
-                        'total_chunks': len(section_chunks),
-                    }
-                )
-
-                if (
-                    section_name == 'claims'
-                    and self.config.preserve_claim_numbers
-                    and (match := re.match(r'^(\d+)\.', chunk))
-                ):
-                    chunk_metadata['claim_number'] = int(match.group(1))
+            section_chunks = self._chunk_section(section_name, section_text, section_splits)
+            total_chunks = len(section_chunks)
+
+            for i, (chunk, claim_number) in enumerate(section_chunks):
+                chunk_metadata = {
+                    **metadata,
+                    'section': section_name,
+                    'chunk_index': i,
+                    'total_chunks': total_chunks,
+                }
+                if claim_number is not None and self.config.preserve_claim_numbers:
+                    chunk_metadata['claim_number'] = claim_number
 
                 chunks.append(LangChainDocument(page_content=chunk, metadata=chunk_metadata))
 
         return chunks
 
     def chunk_documents(self, documents: list[LangChainDocument]) -> list[LangChainDocument]:
-        """Batch process multiple documents."""
-        all_chunks = []
-        for doc in documents:
-            all_chunks.extend(self.chunk_document(doc))
+        """Batch process multiple documents.
+
+        With the sentence transformers splitter, section texts of all documents are
+        tokenized in one batch before being split.
+        """
+        contents = [self._parse_content(doc) for doc in documents]
+        section_splits: dict[str, list[str]] = {}
+        if isinstance(self.splitter, SentenceTransformersTokenTextSplitter):
+            texts = [
+                text
+                for content in contents
+                if content
+                for name, text in content.items()
+                if text and name.lower() != CLAIMS_SECTION
+            ]
+            if texts:
+                section_splits = self._split_on_tokens(self.splitter, list(dict.fromkeys(texts)))
+
+        all_chunks: list[LangChainDocument] = []
+        for doc, content in zip(documents, contents, strict=True):
+            all_chunks.extend(self.chunk_document(doc, content, section_splits))
         return all_chunks
+
+
+def _encoded(ids: list[int]) -> Callable[[str], list[int]]:
+    """Encoder handing back the token ids of a text tokenized beforehand."""
+    return lambda _text: ids
@@ -1,43 +1,151 @@
-from functools import reduce
+import re
+from array import array
+from dataclasses import dataclass, field
+from functools import lru_cache
 
+import numpy as np
 import spacy
 from loguru import logger
+from spacy.tokens import Doc
+
+# Components not needed when only the entity recognizer output is used
+NER_DISABLED = ('tagger', 'parser', 'attribute_ruler', 'lemmatizer')
+
+# Sentence ends and section breaks where a chunk may be split
+SENTENCE_BOUNDARY = re.compile(r'[.!?](?:\s|$)|\n\n')
+
+
+@dataclass(slots=True)
+class EntitiesBatch:
+    """Column-wise buffers of extracted entities, with 32-bit character offsets."""
+
+    texts: list[str] = field(default_factory=list)
+    labels: list[str] = field(default_factory=list)
+    starts: array = field(default_factory=lambda: array('i'))
+    ends: array = field(default_factory=lambda: array('i'))
+
+    def append(self, text: str, label: str, start: int, end: int) -> None:
+        """Append a single entity."""
+        self.texts.append(text)
+        self.labels.append(label)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def to_tuples(self) -> list[tuple[str, str, int, int]]:
+        """Materialize the entities as (text, label, start_char, end_char) tuples."""
+        return list(zip(self.texts, self.labels, self.starts, self.ends, strict=True))
+
+
+@lru_cache(maxsize=4)
+def _load_nlp(model: str, *, coref: bool = True, disable: tuple[str, ...] = ()) -> spacy.Language:
+    """
+    Load a spaCy model, once per process and configuration.
+
+    Args:
+        model: spaCy model name
+        coref: Whether to add the coreference components
+        disable: Pipeline components to disable
+
+    Returns:
+        The loaded spaCy language pipeline
+    """
+    nlp = spacy.load(model, disable=list(disable))
+
+    # Add coreference resolution components
+    if coref and 'experimental_coref' not in nlp.pipe_names:
+        nlp.add_pipe('experimental_coref')
+    if coref and 'experimental_span_resolver' not in nlp.pipe_names:
+        nlp.add_pipe('experimental_span_resolver')
+    return nlp
 
 
 def extract_entities(
     text: str,
-    model: str = 'en_core_web_trf',  # 'en_core_sci_lg'
+    model: str | None = None,  # 'en_core_sci_lg'
     chunk_size: int = 100000,
-    window: int = 200,
+    batch_size: int = 32,
+    n_process: int = 1,
+    *,
+    coref: bool = True,
+    disable: tuple[str, ...] | None = None,
 ) -> list[tuple[str, str, int, int]]:
     """
     Extract entities from large text with cross-chunk coreference resolution.
 
+    The transformer pipeline is only worth its cost for coreference resolution, for
+    plain NER "en_core_web_lg" is much faster and also benefits from batching.
+
     Args:
         text: Input text to process
-        model: spaCy model name (default: "en_core_web_trf")
+        model: spaCy model name (default: "en_core_web_trf" with coref, else "en_core_web_lg")
         chunk_size: Max characters per chunk (default: 100,000)
-        window: Context window for sentence boundaries (default: 200)
+        batch_size: Number of chunks per nlp.pipe batch (default: 32)
+        n_process: Number of processes for nlp.pipe (default: 1)
+        coref: Whether to resolve coreferences across the document (default: True)
+        disable: Pipeline components to disable (default: none with coref, else NER_DISABLED)
 
     Returns:
         List of entity tuples: (text, label, start_char, end_char)
     """
-    nlp = spacy.load(model)
+    model = model or ('en_core_web_trf' if coref else 'en_core_web_lg')
+    if disable is None:
+        disable = () if coref else NER_DISABLED
+    nlp = _load_nlp(model, coref=coref, disable=tuple(disable))
 
-    # Add coreference resolution components
-    if 'experimental_coref' not in nlp.pipe_names:
-        nlp.add_pipe('experimental_coref')
-    if 'experimental_span_resolver' not in nlp.pipe_names:
-        nlp.add_pipe('experimental_span_resolver')
+    full_doc = None
+    coref_chains = {}
+    if coref:
+        # Process full document for coreference resolution
+        logger.info('Performing full-document coreference resolution...')
+        full_doc = nlp(text)
+        coref_chains = _extract_coref_chains(full_doc)
+        logger.info(f'Found {len(coref_chains)} coreference clusters')
+
+    mention_index = _build_mention_index(coref_chains)
+
+    # Short-circuit for small texts
+    if len(text) <= chunk_size:
+        doc = nlp(text) if full_doc is None else full_doc
+        entities = EntitiesBatch()
+        _process_chunk_entities(doc, 0, coref_chains, mention_index, set(), {}, entities)
+        return entities.to_tuples()
+
+    # Split the text at sentence boundaries before processing
+    text_length = len(text)
+    boundaries = _sentence_boundaries(text)
+    chunks = []
+    start_idx = 0
+    while start_idx < text_length:
+        end_idx = _next_boundary(boundaries, start_idx, chunk_size, text_length)
+        chunks.append((text[start_idx:end_idx], start_idx))
+        start_idx = end_idx
+
+    # Process all chunks in batches
+    processed_mentions = set()
+    chain_entities = {}  # Track entity labels for coreference chains
+    entities = EntitiesBatch()
+    docs = nlp.pipe((chunk for chunk, _ in chunks), batch_size=batch_size, n_process=n_process)
+    for doc, (_, offset) in zip(docs, chunks, strict=True):
+        _process_chunk_entities(
+            doc, offset, coref_chains, mention_index, processed_mentions, chain_entities, entities
+        )
+    return entities.to_tuples()
+
+
+def _extract_coref_chains(doc: Doc) -> dict:
+    """
+    Extract coreference clusters from the span groups of a processed document.
 
-    # Process full document for coreference resolution
-    logger.info('Performing full-document coreference resolution...')
-    full_doc = nlp(text)
+    Args:
+        doc: Fully processed document
 
+    Returns:
+        Coreference chains keyed by chain id
+    """
     # Extract coreference clusters from span groups
     coref_chains = {}
     prefix = "coref_clusters"
-    for key, span_group in full_doc.spans.items():
+    for key, span_group in doc.spans.items():
         if key.startswith(f"{prefix}_"):
             try:
                 chain_id = int(key.split('_')[-1])
@@ -52,128 +160,146 @@ def extract_entities(
                     'mentions': mentions,
                 }
 
-    logger.info(f'Found {len(coref_chains)} coreference clusters')
+    return coref_chains
 
-    # Short-circuit for small texts
-    if len(text) <= chunk_size:
-        return _process_chunk_entities(nlp, text, 0, coref_chains, set(), {})
 
-    # Prepare for chunk processing
-    text_length = len(text)
-    processed_mentions = set()
-    chain_entities = {}  # Track entity labels for coreference chains
+def _build_mention_index(coref_chains: dict) -> tuple[np.ndarray, list]:
+    """
+    Index all coreference mentions by start offset.
 
-    def process_chunk(
-        acc: tuple[list[tuple[str, str, int, int]], int], start_idx: int
-    ) -> tuple[list[tuple[str, str, int, int]], int]:
-        entities, last_end = acc
-        end_idx = start_idx + chunk_size
-        is_end_of_text = end_idx >= text_length
+    Chunks look up the mentions they contain with a binary search on the sorted
+    start offsets instead of scanning every chain.
 
-        if is_end_of_text:
-            chunk = text[start_idx:]
-        else:
-            # Find nearest sentence boundary
-            boundary = max(
-                text.rfind('.', end_idx - window, end_idx),
-                text.rfind('?', end_idx - window, end_idx),
-                text.rfind('!', end_idx - window, end_idx),
-                text.rfind('\n\n', end_idx - window, end_idx),  # Section breaks
-            )
-            end_idx = boundary + 1 if boundary > 0 else end_idx
-            chunk = text[start_idx:end_idx]
-
-        # Process chunk
-        chunk_entities = _process_chunk_entities(
-            nlp, chunk, start_idx, coref_chains, processed_mentions, chain_entities
-        )
-        return (entities + chunk_entities, end_idx)
+    Args:
+        coref_chains: Pre-resolved coreference chains
 
-    # Process all chunks
-    result, _ = reduce(
-        process_chunk,
-        range(0, text_length, chunk_size),
-        ([], 0),  # (entities, last_end_idx)
+    Returns:
+        Sorted mention start offsets, and the (chain_id, mention) pairs in the same order
+    """
+    mentions = sorted(
+        (
+            (chain_id, mention)
+            for chain_id, chain_info in coref_chains.items()
+            for mention in chain_info['mentions']
+        ),
+        key=lambda item: item[1][0],
+    )
+    mention_starts = np.fromiter(
+        (mention[0] for _, mention in mentions), dtype=np.int64, count=len(mentions)
     )
-    return result
+    return mention_starts, mentions
+
+
+def _sentence_boundaries(text: str) -> np.ndarray:
+    """
+    Collect the offsets right after every sentence boundary of the text.
+
+    The text is scanned once, chunk ends are then looked up in the sorted offsets.
+
+    Args:
+        text: Input text being chunked
+
+    Returns:
+        Sorted end offsets of the sentence boundaries
+    """
+    return np.fromiter((m.end() for m in SENTENCE_BOUNDARY.finditer(text)), dtype=np.int64)
+
+
+def _next_boundary(
+    boundaries: np.ndarray, start_idx: int, chunk_size: int, text_length: int
+) -> int:
+    """
+    Find where the chunk starting at start_idx should end.
+
+    Args:
+        boundaries: Sorted sentence boundary offsets of the text
+        start_idx: Character offset of the chunk start
+        chunk_size: Max characters per chunk
+        text_length: Length of the text being chunked
+
+    Returns:
+        End offset of the chunk, at the last sentence boundary within chunk_size if any
+    """
+    end_idx = start_idx + chunk_size
+    if end_idx >= text_length:
+        return text_length
+    idx = int(np.searchsorted(boundaries, end_idx, side='right')) - 1
+    if idx >= 0 and boundaries[idx] > start_idx:
+        return int(boundaries[idx])
+    return end_idx
 
 
 def _process_chunk_entities(
-    nlp: spacy.Language,
-    chunk: str,
+    doc: Doc,
     offset: int,
     coref_chains: dict,
+    mention_index: tuple[np.ndarray, list],
     processed_mentions: set,
     chain_entities: dict,
-) -> list[tuple[str, str, int, int]]:
+    entities: EntitiesBatch,
+) -> None:
     """
     Process entities in a chunk with coreference awareness.
 
     Args:
-        nlp: spaCy language model
-        chunk: Text chunk to process
+        doc: Processed text chunk
         offset: Character offset in original text
         coref_chains: Pre-resolved coreference chains
+        mention_index: Coreference mention index from _build_mention_index
         processed_mentions: Set of processed mentions
         chain_entities: Entity labels for chains
-
-    Returns:
-        List of entity tuples
+        entities: Buffers the chunk entities are appended to
     """
-    doc = nlp(chunk)
-    entities = []
+    chunk_length = len(doc.text)
     local_mentions = set()
 
-    # Process coreference chains
-    if coref_chains:
-        for chain_id, chain_info in coref_chains.items():
-            for _mention_idx, mention in enumerate(chain_info['mentions']):
-                start, end, mention_text = mention
-                # Adjust indices for chunk boundaries
-                if not (offset <= start < offset + len(chunk)):
-                    continue
-
-                # Calculate relative position in chunk
-                rel_start = start - offset
-                rel_end = end - offset
-                span = doc.char_span(rel_start, rel_end, alignment_mode='expand')
-
-                if not span:
-                    continue
-
-                # Create mention identifier
-                mention_id = (start, end)
-
-                # Skip already processed mentions
-                if mention_id in processed_mentions:
-                    continue
-
-                # Get or determine entity label
-                if chain_id in chain_entities:
-                    label = chain_entities[chain_id]
-                elif span.ents:
-                    label = span.ents[0].label_
+    # Process coreference mentions starting inside the chunk
+    mention_starts, mentions = mention_index
+    lo, hi = np.searchsorted(mention_starts, (offset, offset + chunk_length))
+    for chain_id, (start, end, mention_text) in mentions[lo:hi]:
+        chain_info = coref_chains[chain_id]
+
+        # Calculate relative position in chunk
+        rel_start = start - offset
+        rel_end = end - offset
+        span = doc.char_span(rel_start, rel_end, alignment_mode='expand')
+
+        if not span:
+            continue
+
+        # Create mention identifier
+        mention_id = (start, end)
+
+        # Skip already processed mentions
+        if mention_id in processed_mentions:
+            continue
+
+        # Get or determine entity label
+        if chain_id in chain_entities:
+            label = chain_entities[chain_id]
+        elif span.ents:
+            label = span.ents[0].label_
+            chain_entities[chain_id] = label
+        else:
+            # Try to get label from main mention
+            main_mention = chain_info['mentions'][chain_info['main_mention']]
+            main_start, main_end, _ = main_mention
+            if offset <= main_start < offset + chunk_length:
+                main_span = doc.char_span(
+                    main_start - offset, main_end - offset, alignment_mode='expand'
+                )
+                if main_span and main_span.ents:
+                    label = main_span.ents[0].label_
                     chain_entities[chain_id] = label
                 else:
-                    # Try to get label from main mention
-                    main_mention = chain_info['mentions'][chain_info['main_mention']]
-                    main_start, main_end, _ = main_mention
-                    if offset <= main_start < offset + len(chunk):
-                        main_span = doc.char_span(
-                            main_start - offset, main_end - offset, alignment_mode='expand'
-                        )
-                        if main_span and main_span.ents:
-                            label = main_span.ents[0].label_
-                            chain_entities[chain_id] = label
-                        else:
-                            label = 'CORE'
-                    else:
-                        label = 'CORE'
-
-                # Add entity
-                entities.append((mention_text, label, start, end))
-                processed_mentions.add(mention_id)
-                local_mentions.add(mention_id)
+                    label = 'CORE'
+            else:
+                label = 'CORE'
+
+        # Add entity
+        entities.append(mention_text, label, start, end)
+        processed_mentions.add(mention_id)
+        local_mentions.add(mention_id)
 
     # Process regular entities not in coref chains
     for ent in doc.ents:
@@ -182,8 +308,6 @@ def _process_chunk_entities(
         ent_id = (start, end)
 
         if ent_id not in processed_mentions:
-            entities.append((ent.text, ent.label_, start, end))
+            entities.append(ent.text, ent.label_, start, end)
             processed_mentions.add(ent_id)
             local_mentions.add(ent_id)
-
-    return entities
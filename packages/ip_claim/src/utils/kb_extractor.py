@@ -4,19 +4,65 @@ Knowledge Graph Extraction Pipeline with spaCy and LLM.
 This pipeline:
 1. Extracts entities from text using spaCy with chunking for large documents
 2. Uses an LLM to identify relationships between extracted entities
-3. Stores entities and relationships in pandas DataFrames
+3. Stores entities in a columnar polars DataFrame
 4. Can be extended to generate Cypher or other outputs
 """
 
-from functools import reduce
-from typing import Literal
+import asyncio
+import re
+from functools import lru_cache
+from typing import Any, Literal
 
 import dspy
+import numpy as np
+import orjson
+import polars as pl
 import spacy
 
+# Markdown code fence an LLM may wrap around its JSON output
+_FENCE = re.compile(r'^\s*```(?:json)?\s*|\s*```\s*$')
+
+# Sentence ends and line breaks where a chunk may be split
+SENTENCE_BOUNDARY = re.compile(r'[.!?](?:\s|$)|\n')
+
+# Parsed output of the relation extraction
+Relations = dict[
+    Literal['relations'], list[dict[Literal['e_1'] | Literal['rel'] | Literal['e_2'], str]]
+]
+
+ENTITY_SCHEMA = {
+    'text': pl.String,
+    'label': pl.Categorical,
+    'start_char': pl.Int32,
+    'end_char': pl.Int32,
+}
+
+
+@lru_cache(maxsize=4)
+def _load_nlp(model: str) -> spacy.Language:
+    """
+    Load a spaCy model with the entity ruler, once per process.
+
+    Only the NER components are kept enabled, since only entity spans are used.
+
+    Args:
+        model: spaCy model name
+
+    Returns:
+        The loaded spaCy language pipeline
+    """
+    nlp = spacy.load(model, disable=['tagger', 'parser', 'attribute_ruler', 'lemmatizer'])
+    if 'entity_ruler' not in nlp.pipe_names:
+        nlp.add_pipe('entity_ruler', after='ner', config={'overwrite_ents': True})
+    return nlp
+
 
 def extract_entities(
-    text: str, model: str = 'en_core_web_lg', chunk_size: int = 100000, window: int = 200
+    text: str,
+    model: str = 'en_core_web_lg',
+    chunk_size: int = 100000,
+    batch_size: int = 32,
+    n_process: int = 1,
 ) -> list[tuple]:  # TODO: Add Coreference
     """
     Extract entities from large text by splitting into chunks and avoiding boundary errors.
@@ -25,51 +71,95 @@ def extract_entities(
         text: Input text to process
         model: spaCy model name (default: "en_core_web_lg")
         chunk_size: Max characters per chunk (default: 100,000)
-        window: Context window to find sentence boundaries (default: 200)
+        batch_size: Number of chunks per nlp.pipe batch (default: 32)
+        n_process: Number of processes for nlp.pipe (default: 1)
 
     Returns:
         List of entity tuples: (text, label, start_char, end_char)
     """
-    nlp = spacy.load(model)
-    nlp.add_pipe('entity_ruler', after='ner', config={'overwrite_ents': True})
+    nlp = _load_nlp(model)
     # Short-circuit for small texts
     if len(text) <= chunk_size:
         doc = nlp(text)
         return [(ent.text, ent.label_, ent.start_char, ent.end_char) for ent in doc.ents]
 
+    # Split the text at sentence boundaries to avoid splitting entities
     text_length = len(text)
-
-    def process_chunk(acc, start_idx):
-        entities, _ = acc
-        end_idx = start_idx + chunk_size
-        is_end_of_text = end_idx >= text_length
-
-        if is_end_of_text:
-            chunk = text[start_idx:]
-        else:
-            # Find the nearest sentence boundary to avoid splitting entities
-            boundary = max(
-                text.rfind('.', end_idx - window, end_idx),
-                text.rfind('?', end_idx - window, end_idx),
-                text.rfind('!', end_idx - window, end_idx),
-                text.rfind('\n', end_idx - window, end_idx),
-            )
-            end_idx = boundary + 1 if boundary > 0 else end_idx
-            chunk = text[start_idx:end_idx]
-
-        doc = nlp(chunk)
-        new_entities = [
-            (ent.text, ent.label_, start_idx + ent.start_char, start_idx + ent.end_char)
+    boundaries = _sentence_boundaries(text)
+    chunks = []
+    start_idx = 0
+    while start_idx < text_length:
+        end_idx = _next_boundary(boundaries, start_idx, chunk_size, text_length)
+        chunks.append((text[start_idx:end_idx], start_idx))
+        start_idx = end_idx
+
+    entities = []
+    docs = nlp.pipe((chunk for chunk, _ in chunks), batch_size=batch_size, n_process=n_process)
+    for doc, (_, offset) in zip(docs, chunks, strict=True):
+        entities.extend(
+            (ent.text, ent.label_, offset + ent.start_char, offset + ent.end_char)
             for ent in doc.ents
-        ]
-        return (entities + new_entities, end_idx)
+        )
+    return entities
+
 
-    result, _ = reduce(
-        process_chunk,
-        range(0, text_length, chunk_size),
-        ([], 0),  # Initial accumulator: (empty entities list, last end_idx)
+def _sentence_boundaries(text: str) -> np.ndarray:
+    """
+    Collect the offsets right after every sentence boundary of the text.
+
+    The text is scanned once, chunk ends are then looked up in the sorted offsets.
+
+    Args:
+        text: Input text being chunked
+
+    Returns:
+        Sorted end offsets of the sentence boundaries
+    """
+    return np.fromiter((m.end() for m in SENTENCE_BOUNDARY.finditer(text)), dtype=np.int64)
+
+
+def _next_boundary(
+    boundaries: np.ndarray, start_idx: int, chunk_size: int, text_length: int
+) -> int:
+    """
+    Find where the chunk starting at start_idx should end.
+
+    Args:
+        boundaries: Sorted sentence boundary offsets of the text
+        start_idx: Character offset of the chunk start
+        chunk_size: Max characters per chunk
+        text_length: Length of the text being chunked
+
+    Returns:
+        End offset of the chunk, at the last sentence boundary within chunk_size if any
+    """
+    end_idx = start_idx + chunk_size
+    if end_idx >= text_length:
+        return text_length
+    idx = int(np.searchsorted(boundaries, end_idx, side='right')) - 1
+    if idx >= 0 and boundaries[idx] > start_idx:
+        return int(boundaries[idx])
+    return end_idx
+
+
+def entities_frame(entities: list[tuple]) -> pl.DataFrame:
+    """
+    Build a columnar DataFrame from extracted entity tuples.
+
+    Labels come from a small vocabulary, so they are stored as a categorical column,
+    and character offsets fit in 32-bit integers.
+
+    Args:
+        entities: Entity tuples from extract_entities: (text, label, start_char, end_char)
+
+    Returns:
+        DataFrame with text, label, start_char and end_char columns
+    """
+    texts, labels, starts, ends = zip(*entities, strict=True) if entities else ((), (), (), ())
+    return pl.DataFrame(
+        {'text': texts, 'label': labels, 'start_char': starts, 'end_char': ends},
+        schema=ENTITY_SCHEMA,
     )
-    return result
 
 
 class EntityExtraction(dspy.Signature):
@@ -92,9 +182,7 @@ class RelationExtraction(dspy.Signature):
 
     text: str = dspy.InputField(desc='Text to analyze for relationships')
     entities: list[str] = dspy.InputField(desc='List of string entities')
-    relations: dict[
-        Literal['relations'], list[dict[Literal['e_1'] | Literal['rel'] | Literal['e_2'], str]]
-    ] = dspy.OutputField(desc='Relationships in JSON format')
+    relations: Relations = dspy.OutputField(desc='Relationships in JSON format')
 
 
 class KGBuilder(dspy.Module):
@@ -105,20 +193,58 @@ class KGBuilder(dspy.Module):
         self.extract_entities = dspy.ChainOfThought(EntityExtraction)
         self.extract_relations = dspy.ChainOfThought(RelationExtraction)
 
-    def __call__(
-        self, text: str
-    ) -> dict[
-        Literal['relations'], list[dict[Literal['e_1'] | Literal['rel'] | Literal['e_2'], str]]
-    ]:
+    def __call__(self, text: str) -> Relations:
         """
         Extract relationships between entities using LLM.
 
         Args:
             text: Original text containing entities
-            entities: List of entity tuples from spaCy
 
         Returns:
-            Dictionary of parsed relationships
+            Dictionary of parsed relationships, rather than the dspy Prediction
+        """
+        entities = self.extract_entities(text=text).entities
+        return _parse_relations(self.extract_relations(text=text, entities=entities).relations)
+
+    async def abatch(self, texts: list[str], max_inflight: int = 32) -> list[Relations]:
+        """
+        Extract relationships for many independent texts concurrently.
+
+        Each text runs its entity and relation extraction in a worker thread, so the LLM
+        server can batch the requests of different texts. A semaphore bounds the texts
+        in flight, the default executor of the loop further caps the threads.
+
+        Args:
+            texts: Texts to extract relationships from
+            max_inflight: Max number of texts processed at the same time (default: 32)
+
+        Returns:
+            Dictionaries of parsed relationships, in the order of the texts
         """
-        entities = self.extract_entities(text=text)
-        return self.extract_relations(text=text, entities=entities)
+        semaphore = asyncio.Semaphore(max_inflight)
+
+        async def extract(text: str) -> Relations:
+            async with semaphore:
+                return await asyncio.to_thread(self, text)
+
+        relations: list[Relations] = await asyncio.gather(*(extract(text) for text in texts))
+        return relations
+
+
+def _parse_relations(relations: Any) -> Relations:
+    """
+    Parse the relations output, which the LLM may return as fenced JSON text.
+
+    Args:
+        relations: Relations output field of the relation extraction
+
+    Returns:
+        Dictionary of relationships, empty if the output is not a JSON object
+    """
+    if isinstance(relations, dict):
+        return relations
+    try:
+        parsed = orjson.loads(_FENCE.sub('', str(relations)))
+    except orjson.JSONDecodeError:
+        parsed = None
+    return parsed if isinstance(parsed, dict) else {'relations': []}
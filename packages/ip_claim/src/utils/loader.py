@@ -1,58 +1,140 @@
-from collections.abc import AsyncGenerator
-from typing import Any
+import asyncio
+import atexit
+import multiprocessing
+from collections import deque
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
+from functools import lru_cache, partial
+from typing import Any, ClassVar, TypeVar
 
+import orjson
 from beanie import Document as BeanieDocument
 from langchain_core.documents import Document as LangChainDocument
 
 from models.hupd import PatentApplication
 from models.langchain_patent_doc import LangChainPatentContent, LangChainPatentMetadata
 
+T = TypeVar('T')
+
+# Builds the page content and metadata of a raw patent application, called
+# with ``(raw, *, validate)``
+Converter = Callable[..., tuple[str, dict[str, Any]]]
+
+# Fields of a patent application read by the conversion
+PROJECTION = {
+    '_id': 0,
+    'metadata.application_number': 1,
+    'metadata.publication_number': 1,
+    'metadata.patent_number': 1,
+    'metadata.title': 1,
+    'metadata.decision': 1,
+    'dates.filing_date': 1,
+    'dates.patent_issue_date': 1,
+    'dates.abandon_date': 1,
+    'classification': 1,
+    'examiner.examiner_id': 1,
+    'examiner.examiner_name_first': 1,
+    'examiner.examiner_name_last': 1,
+    'inventor_list.inventor_country': 1,
+    'content': 1,
+}
+
+# Page content sections assembled by MongoDB, in the order of LangChainPatentContent
+PAGE_CONTENT_FIELDS = {
+    'Title': '$metadata.title',
+    'Abstract': '$content.abstract',
+    'Claims': '$content.claims',
+    'Background': '$content.background',
+    'Summary': '$content.summary',
+    'Description': '$content.full_description',
+}
+# PROJECTION with the content sections replaced by the assembled page content
+AGGREGATED_PROJECTION = {
+    **{field: value for field, value in PROJECTION.items() if field != 'content'},
+    '_page_content': PAGE_CONTENT_FIELDS,
+}
+
+# Documents per converted batch, also the cursor batch size. Aim for batches of a few
+# MB, i.e. batch_size ~ target_batch_bytes / avg_document_bytes. HUPD applications
+# weigh tens of KB with their full description, so larger batches mostly add memory:
+# up to MAX_PENDING_BATCHES of them are converted at once, and MongoDB caps each
+# cursor reply at 16 MB whatever the batch size.
+DEFAULT_BATCH_SIZE = 1000
+
+# Converted batches awaited from the worker processes at the same time
+MAX_PENDING_BATCHES = 4
+
+
+class _Done:
+    """Type of the marker ending the prefetched batches."""
+
+
+# Marks the end of the prefetched batches
+_DONE = _Done()
+
 
 class PatentConverter:
-    """Converts PatentApplication documents to LangChain documents with batching."""
+    """Converts PatentApplication documents to LangChain documents with batching.
 
-    @staticmethod
-    def _build_page_content(patent: BeanieDocument) -> str:
+    The source documents are already validated by Beanie, so page content and metadata
+    are built directly. Set ``validate`` to route them through the LangChain models,
+    e.g. when debugging the schema.
+    """
+
+    validate: ClassVar[bool] = False
+
+    @classmethod
+    def _build_page_content(cls, patent: BeanieDocument) -> str:
         """Construct page content from specified sections."""
-        return LangChainPatentContent(
-            Title=patent.metadata.title,
-            Abstract=patent.content.abstract,
-            Claims=patent.content.claims,
-            Background=patent.content.background,
-            Summary=patent.content.summary,
-            Description=patent.content.full_description,
-        ).model_dump_json()
+        content = patent.content
+        sections = {
+            'Title': patent.metadata.title,
+            'Abstract': content.abstract,
+            'Claims': content.claims,
+            'Background': content.background,
+            'Summary': content.summary,
+            'Description': content.full_description,
+        }
+        return _dump_page_content(sections, validate=cls.validate)
 
-    @staticmethod
-    def _build_metadata(patent: BeanieDocument) -> dict[str, Any]:
+    @classmethod
+    def _build_metadata(cls, patent: BeanieDocument) -> dict[str, Any]:
         """Extract and format metadata."""
-        return LangChainPatentMetadata(
-            application_number=patent.metadata.application_number,
-            publication_number=patent.metadata.publication_number,
-            patent_number=patent.metadata.patent_number,
-            title=patent.metadata.title,
-            decision=patent.metadata.decision,
-            filing_date=patent.dates.filing_date.isoformat() if patent.dates.filing_date else None,
-            patent_issue_date=(
-                patent.dates.patent_issue_date.isoformat()
-                if patent.dates.patent_issue_date
-                else None
-            ),
-            abandon_date=(
-                patent.dates.abandon_date.isoformat() if patent.dates.abandon_date else None
+        # Bind the nested models once, this runs for every converted patent
+        application = patent.metadata
+        dates = patent.dates
+        classification = patent.classification
+        examiner = patent.examiner
+        filing_date = dates.filing_date
+        patent_issue_date = dates.patent_issue_date
+        abandon_date = dates.abandon_date
+        metadata = {
+            'application_number': application.application_number,
+            'publication_number': application.publication_number,
+            'patent_number': application.patent_number,
+            'title': application.title,
+            'decision': application.decision,
+            'filing_date': filing_date.isoformat() if filing_date else None,
+            'patent_issue_date': patent_issue_date.isoformat() if patent_issue_date else None,
+            'abandon_date': abandon_date.isoformat() if abandon_date else None,
+            'main_cpc_label': classification.main_cpc_label,
+            'cpc_labels': classification.cpc_labels or [],
+            'main_ipcr_label': classification.main_ipcr_label,
+            'ipcr_labels': classification.ipcr_labels or [],
+            'uspc_class': classification.uspc_class,
+            'uspc_subclass': classification.uspc_subclass,
+            'examiner_id': examiner.examiner_id,
+            'examiner_name': _examiner_name(
+                examiner.examiner_id, examiner.examiner_name_first, examiner.examiner_name_last
             ),
-            main_cpc_label=patent.classification.main_cpc_label,
-            cpc_labels=patent.classification.cpc_labels,
-            main_ipcr_label=patent.classification.main_ipcr_label,
-            ipcr_labels=patent.classification.ipcr_labels,
-            uspc_class=patent.classification.uspc_class,
-            uspc_subclass=patent.classification.uspc_subclass,
-            examiner_id=patent.examiner.examiner_id,
-            examiner_name=f'{patent.examiner.examiner_name_first} {patent.examiner.examiner_name_last}',
-            inventor_countries=patent.inventor_countries,
-            inventor_count=len(patent.inventors),
-            filing_year=patent.filing_year,
-        ).model_dump()
+            'inventor_countries': patent.inventor_countries,
+            'inventor_count': len(patent.inventors),
+            'filing_year': filing_date.year,
+        }
+        if cls.validate:
+            return LangChainPatentMetadata(**metadata).model_dump()
+        return metadata
 
     @classmethod
     def convert_document(cls, patent: BeanieDocument) -> LangChainDocument:
@@ -61,26 +143,349 @@ class PatentConverter:
             page_content=cls._build_page_content(patent), metadata=cls._build_metadata(patent)
         )
 
+    @classmethod
+    def convert_document_raw(cls, raw: dict[str, Any]) -> LangChainDocument:
+        """Convert a raw MongoDB patent application, e.g. read with PROJECTION."""
+        page_content, metadata = _convert_raw(raw, validate=cls.validate)
+        return LangChainDocument(page_content=page_content, metadata=metadata)
+
     @classmethod
     async def batch_convert(
-        cls, query: Any = None, batch_size: int = 1000, projection: dict[str, int] | None = None
+        cls,
+        query: Any = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        projection: dict[str, int] | None = None,
     ) -> AsyncGenerator[list[LangChainDocument], None]:
         """
         Convert documents in batches for memory efficiency.
 
+        Raw documents are read straight from the Motor cursor and converted in worker
+        processes, so the conversion neither holds the GIL of the event loop nor waits
+        for the next batch, which is fetched from MongoDB in the background.
+
+        Args:
+            query: Beanie query object for filtering
+            batch_size: Number of documents per batch (default: DEFAULT_BATCH_SIZE)
+            projection: MongoDB projection to limit fields retrieved (default: PROJECTION)
+        """
+        cursor = cls._find_cursor(query, batch_size, projection)
+        async for converted in cls._convert_batches(
+            cursor, batch_size, _convert_many, _convert_raw
+        ):
+            yield _to_documents(converted)
+
+    @classmethod
+    async def batch_convert_prefetch(
+        cls,
+        query: Any = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        projection: dict[str, int] | None = None,
+        prefetch: int = 2,
+    ) -> AsyncGenerator[list[LangChainDocument], None]:
+        """
+        Convert documents in batches, converting ahead while the consumer handles a batch.
+
+        batch_convert only submits new batches to the workers when the consumer asks for
+        the next one. Here it runs in a background task, so reading and converting keep
+        going while the consumer works on the batches already yielded.
+
+        Args:
+            query: Beanie query object for filtering
+            batch_size: Number of documents per batch (default: DEFAULT_BATCH_SIZE)
+            projection: MongoDB projection to limit fields retrieved (default: PROJECTION)
+            prefetch: Max number of converted batches buffered ahead of the consumer
+        """
+        async for documents in _prefetch(
+            cls.batch_convert(query, batch_size, projection), maxsize=prefetch
+        ):
+            yield documents
+
+    @classmethod
+    async def batch_convert_serialized(
+        cls,
+        query: Any = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        projection: dict[str, int] | None = None,
+    ) -> AsyncGenerator[bytes, None]:
+        """
+        Convert documents in batches serialized to JSON, for consumers writing them out as is.
+
+        Each batch is a JSON array of ``{"page_content": ..., "metadata": ...}`` objects,
+        encoded in the worker processes. Load it back into LangChain documents with
+        ``[LangChainDocument(**d) for d in orjson.loads(batch)]``.
+
+        Args:
+            query: Beanie query object for filtering
+            batch_size: Number of documents per batch (default: DEFAULT_BATCH_SIZE)
+            projection: MongoDB projection to limit fields retrieved (default: PROJECTION)
+        """
+        cursor = cls._find_cursor(query, batch_size, projection)
+        async for batch in cls._convert_batches(cursor, batch_size, _serialize_many, _convert_raw):
+            yield batch
+
+    @classmethod
+    async def batch_convert_aggregated(
+        cls, query: Any = None, batch_size: int = DEFAULT_BATCH_SIZE
+    ) -> AsyncGenerator[list[LangChainDocument], None]:
+        """
+        Convert documents in batches, with the page content sections assembled by MongoDB.
+
+        The aggregation only ships the sections nested in a single page content object,
+        which the workers serialize as is instead of building it from the content fields.
+
         Args:
             query: Beanie query object for filtering
+            batch_size: Number of documents per batch (default: DEFAULT_BATCH_SIZE)
+        """
+        pipeline: list[dict[str, Any]] = []
+        if query is not None:
+            pipeline.append({'$match': query.get_filter_query()})
+            if query.sort_expressions:
+                pipeline.append({'$sort': dict(query.sort_expressions)})
+            if query.skip_number:
+                pipeline.append({'$skip': query.skip_number})
+            if query.limit_number:
+                pipeline.append({'$limit': query.limit_number})
+        pipeline.append({'$project': AGGREGATED_PROJECTION})
+        cursor = PatentApplication.get_motor_collection().aggregate(pipeline, batchSize=batch_size)
+
+        async for converted in cls._convert_batches(
+            cursor, batch_size, _convert_many, _convert_aggregated
+        ):
+            yield _to_documents(converted)
+
+    @staticmethod
+    def _find_cursor(
+        query: Any, batch_size: int, projection: dict[str, int] | None
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Open a raw Motor cursor over the documents matched by a Beanie query, or all of them."""
+        collection = PatentApplication.get_motor_collection()
+        projection = PROJECTION if projection is None else projection
+        if query is None:
+            # Full scans read the collection in natural order, no query object needed
+            return collection.find({}, projection, batch_size=batch_size)
+        return collection.find(
+            query.get_filter_query(),
+            projection,
+            sort=query.sort_expressions or None,
+            skip=query.skip_number,
+            limit=query.limit_number,
+            batch_size=batch_size,
+        )
+
+    @classmethod
+    async def _convert_batches(
+        cls,
+        cursor: AsyncIterator[dict[str, Any]],
+        batch_size: int,
+        worker: Callable[..., T],
+        convert: Converter,
+    ) -> AsyncGenerator[T, None]:
+        """
+        Run a worker over the batches of a raw cursor in the worker processes.
+
+        Args:
+            cursor: Raw documents to convert
             batch_size: Number of documents per batch
-            projection: MongoDB projection to limit fields retrieved
+            worker: Function converting a batch of raw documents with ``convert``, called
+                with ``(raws, *, validate, convert)``
+            convert: Function converting a single raw document
         """
-        query = query or PatentApplication.find_all()
-        current_batch = []
+        loop = asyncio.get_running_loop()
+        pool = _get_pool()
+        convert_batch = partial(worker, validate=cls.validate, convert=convert)
+        pending: deque[asyncio.Future[T]] = deque()
+        async for raws in _prefetch(_batched(cursor, batch_size)):
+            pending.append(loop.run_in_executor(pool, convert_batch, raws))
+            if len(pending) >= MAX_PENDING_BATCHES:
+                yield await pending.popleft()
+
+        while pending:
+            yield await pending.popleft()
+
+
+def _convert_raw(raw: dict[str, Any], *, validate: bool = False) -> tuple[str, dict[str, Any]]:
+    """Build page content and metadata from a raw MongoDB patent application."""
+    content = raw['content']
+    page_content = {
+        'Title': raw['metadata']['title'],
+        'Abstract': content['abstract'],
+        'Claims': content['claims'],
+        'Background': content['background'],
+        'Summary': content['summary'],
+        'Description': content['full_description'],
+    }
+    return (
+        _dump_page_content(page_content, validate=validate),
+        _raw_metadata(raw, validate=validate),
+    )
+
+
+def _convert_aggregated(
+    raw: dict[str, Any], *, validate: bool = False
+) -> tuple[str, dict[str, Any]]:
+    """Build page content and metadata from a patent application read with AGGREGATED_PROJECTION."""
+    return (
+        _dump_page_content(raw['_page_content'], validate=validate),
+        _raw_metadata(raw, validate=validate),
+    )
+
+
+def _raw_metadata(raw: dict[str, Any], *, validate: bool = False) -> dict[str, Any]:
+    """Build the metadata of a raw MongoDB patent application."""
+    metadata = raw['metadata']
+    dates = raw['dates']
+    classification = raw['classification']
+    examiner = raw['examiner']
+    inventors = raw.get('inventor_list') or []
+    filing_date = dates.get('filing_date')
+    patent_issue_date = dates.get('patent_issue_date')
+    abandon_date = dates.get('abandon_date')
+
+    patent_metadata = {
+        'application_number': metadata['application_number'],
+        'publication_number': metadata.get('publication_number'),
+        'patent_number': metadata['patent_number'],
+        'title': metadata['title'],
+        'decision': metadata['decision'],
+        'filing_date': filing_date.isoformat() if filing_date else None,
+        'patent_issue_date': patent_issue_date.isoformat() if patent_issue_date else None,
+        'abandon_date': abandon_date.isoformat() if abandon_date else None,
+        'main_cpc_label': classification.get('main_cpc_label'),
+        'cpc_labels': classification.get('cpc_labels') or [],
+        'main_ipcr_label': classification.get('main_ipcr_label'),
+        'ipcr_labels': classification.get('ipcr_labels') or [],
+        'uspc_class': classification.get('uspc_class'),
+        'uspc_subclass': classification.get('uspc_subclass'),
+        'examiner_id': examiner['examiner_id'],
+        'examiner_name': _examiner_name(
+            examiner['examiner_id'], examiner['examiner_name_first'], examiner['examiner_name_last']
+        ),
+        'inventor_countries': list(
+            {inv['inventor_country'] for inv in inventors if inv.get('inventor_country')}
+        ),
+        'inventor_count': len(inventors),
+        'filing_year': filing_date.year,
+    }
+    if validate:
+        return LangChainPatentMetadata(**patent_metadata).model_dump()
+    return patent_metadata
+
+
+@lru_cache(maxsize=4096)
+def _examiner_name(examiner_id: str | None, first: str | None, last: str | None) -> str:
+    """Format the name of an examiner.
+
+    Consecutive patents often share an examiner, the cache then hands out the same
+    string instead of formatting a new one, which also keeps the pickled batches sent
+    back from the worker processes smaller.
+    """
+    return f'{first} {last}'
+
+
+def _dump_page_content(content: dict[str, str], *, validate: bool = False) -> str:
+    """Serialize the page content sections to the JSON read back by the chunker.
+
+    orjson escapes the long section strings much faster than pydantic's JSON
+    serializer, which is only used to validate against LangChainPatentContent.
+    """
+    if validate:
+        return LangChainPatentContent(**content).model_dump_json()
+    return orjson.dumps(content).decode()
+
+
+def _convert_many(
+    raws: list[dict[str, Any]],
+    *,
+    validate: bool = False,
+    convert: Converter = _convert_raw,
+) -> list[tuple[str, dict[str, Any]]]:
+    """Convert a batch of raw patent applications, run in the worker processes."""
+    return [convert(raw, validate=validate) for raw in raws]
+
+
+def _serialize_many(
+    raws: list[dict[str, Any]], *, validate: bool = False, convert: Converter = _convert_raw
+) -> bytes:
+    """Convert a batch of raw patent applications to a JSON array, run in the worker processes."""
+    return orjson.dumps(
+        [
+            {'page_content': page_content, 'metadata': metadata}
+            for page_content, metadata in _convert_many(raws, validate=validate, convert=convert)
+        ]
+    )
+
+
+def _to_documents(converted: list[tuple[str, dict[str, Any]]]) -> list[LangChainDocument]:
+    """Wrap converted page content and metadata pairs into LangChain documents."""
+    return [
+        LangChainDocument(page_content=page_content, metadata=metadata)
+        for page_content, metadata in converted
+    ]
+
+
+@lru_cache(maxsize=1)
+def _get_pool() -> ProcessPoolExecutor:
+    """Return the process pool converting raw documents, created on first use.
+
+    The pool is shut down at interpreter exit, so its worker processes are not left
+    behind by callers that never close it.
+    """
+    pool = ProcessPoolExecutor(mp_context=multiprocessing.get_context('spawn'))
+    atexit.register(pool.shutdown)
+    return pool
+
+
+async def _batched(  # noqa: UP047
+    items: AsyncIterator[T], size: int
+) -> AsyncGenerator[list[T], None]:
+    """Group the items of an async iterator into lists of up to ``size`` items.
+
+    A new list is used for every batch, since the process pool pickles submitted
+    batches lazily.
+    """
+    batch: list[T] = []
+    async for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
+
+
+async def _prefetch(  # noqa: UP047
+    batches: AsyncIterator[T], maxsize: int = 2
+) -> AsyncGenerator[T, None]:
+    """
+    Pull batches in a background task while the consumer handles the previous ones.
+
+    Args:
+        batches: Async iterator of batches to prefetch
+        maxsize: Max number of batches buffered ahead of the consumer
+    """
+    queue: asyncio.Queue[T | Exception | _Done] = asyncio.Queue(maxsize=maxsize)
+    producer = asyncio.create_task(_fill_queue(batches, queue))
+    try:
+        while not isinstance(batch := await queue.get(), _Done):
+            if isinstance(batch, Exception):
+                raise batch
+            yield batch
+    finally:
+        producer.cancel()
+        with suppress(asyncio.CancelledError):
+            await producer
 
-        async for patent in query.project(projection_model=projection):
-            current_batch.append(cls.convert_document(patent))
-            if len(current_batch) >= batch_size:
-                yield current_batch
-                current_batch = []
 
-        if current_batch:
-            yield current_batch
+async def _fill_queue(  # noqa: UP047
+    batches: AsyncIterator[T], queue: asyncio.Queue[T | Exception | _Done]
+) -> None:
+    """Put the batches in the queue, followed by ``_DONE`` or the error that ended them."""
+    try:
+        async for batch in batches:
+            await queue.put(batch)
+    except Exception as e:
+        await queue.put(e)
+    else:
+        await queue.put(_DONE)
@@ -1,13 +1,20 @@
 import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+from bson import encode
+from bson.raw_bson import RawBSONDocument
+from loguru import logger
 from omegaconf import OmegaConf
+from pymongo.errors import BulkWriteError
 from returns.future import FutureResult
 from returns.io import IO
+from returns.unsafe import unsafe_perform_io
 
-from models.hupd import PatentApplication
-from scripts.hupd_importer import Importer, main
+from models.hupd import WRITE_INDEXES, PatentApplication
+from scripts.hupd_importer import Importer, _iter_json_files, main
 
 SAMPLE_CONFIG = OmegaConf.create(
     {
@@ -15,10 +22,12 @@ SAMPLE_CONFIG = OmegaConf.create(
             'uri': 'mongodb://mock:27017',
             'max_pool_size': 10,
             'timeout_ms': 5000,
+            'write_concern': {'w': 1, 'journal': False},
+            'compressors': 'zlib',
             'db_name': 'test_db',
             'index_options': {'allow_dropping': True},
         },
-        'importer': {'data_dir': '/fake/data/dir'},
+        'importer': {'data_dir': '/fake/data/dir', 'batch_size': 2, 'concurrency': 2, 'workers': 1},
     }
 )
 
@@ -70,6 +79,7 @@ async def test_init_db_success(importer):
     with (
         patch('scripts.hupd_importer.AsyncIOMotorClient', autospec=True) as mock_client,
         patch('scripts.hupd_importer.init_beanie', AsyncMock()) as mock_init_beanie,
+        patch.object(PatentApplication, 'get_motor_collection') as mock_get_collection,
     ):
         result = await importer.init_db()
         result.unwrap()
@@ -78,8 +88,12 @@ async def test_init_db_success(importer):
             SAMPLE_CONFIG.db.uri,
             maxPoolSize=SAMPLE_CONFIG.db.max_pool_size,
             serverSelectionTimeoutMS=SAMPLE_CONFIG.db.timeout_ms,
+            w=SAMPLE_CONFIG.db.write_concern.w,
+            journal=SAMPLE_CONFIG.db.write_concern.journal,
+            compressors=SAMPLE_CONFIG.db.compressors,
         )
         mock_init_beanie.assert_awaited_once()
+        assert importer._collection is mock_get_collection.return_value
 
 
 @pytest.mark.asyncio
@@ -88,19 +102,15 @@ async def test_process_file_success(importer, tmp_path):
     file_path = tmp_path / 'test.json'
     file_path.write_text(json.dumps(SAMPLE_PATENT_JSON))
 
-    # Mock database queries and insertion
-    with (
-        patch.object(PatentApplication, 'find_one', AsyncMock(return_value=None)),
-        patch.object(Importer, '_insert_into_db', AsyncMock()) as mock_insert,
-    ):
-        print(await importer.process_file(file_path))
-        # Verify insertion was called with expected data
-        mock_insert.assert_awaited_once()
-        inserted_patent = mock_insert.call_args.args[0]
-        assert inserted_patent.metadata.title == 'Test Patent'
-        assert inserted_patent.examiner.examiner_name_last == 'SMITH'
-        assert len(inserted_patent.inventors) == 1
-        assert inserted_patent.content.abstract == 'Test abstract'
+    patent = await importer.process_file(file_path)
+    # Verify the encoded document is returned for bulk insertion
+    assert isinstance(patent, RawBSONDocument)
+    assert patent['metadata']['title'] == 'Test Patent'
+    assert patent['examiner']['examiner_name_last'] == 'SMITH'
+    assert len(patent['inventor_list']) == 1
+    assert patent['content']['abstract'] == 'Test abstract'
+    assert patent['dates']['filing_date'] == datetime(2014, 3, 26)
+    assert patent['dates']['abandon_date'] is None
 
 
 @pytest.mark.asyncio
@@ -110,16 +120,83 @@ async def test_process_file_invalid(importer, tmp_path):
     file_path.write_text('{invalid: json}')  # Invalid JSON format
 
     result = await importer.process_file(file_path)
-    assert result.failure()  # Check that the result is a failure due to JSONDecodeError
+    assert result is None  # The JSONDecodeError is logged and the file is skipped
+
+
+@pytest.mark.asyncio
+async def test_process_file_not_object(importer, tmp_path):
+    """Test that a JSON file without an object at the top level is skipped."""
+    file_path = tmp_path / 'list.json'
+    file_path.write_text(json.dumps([SAMPLE_PATENT_JSON]))
+
+    assert await importer.process_file(file_path) is None
+
+
+@pytest.mark.asyncio
+async def test_process_file_no_publication_number(importer, tmp_path):
+    """Test that files without a publication number are skipped with a warning."""
+    file_path = tmp_path / 'unpublished.json'
+    file_path.write_text(json.dumps({**SAMPLE_PATENT_JSON, 'publication_number': ''}))
+
+    messages = []
+    handler = logger.add(messages.append, level='WARNING')
+    try:
+        assert await importer.process_file(file_path) is None
+    finally:
+        logger.remove(handler)
+    assert any('No publication_number found' in message for message in messages)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    'overrides',
+    [
+        {'filing_date': ''},
+        {'filing_date': '2014-13-45'},
+        {'title': None},
+        {'claims': None},
+    ],
+    ids=['empty_filing_date', 'invalid_filing_date', 'no_title', 'no_claims'],
+)
+async def test_process_file_incomplete(importer, tmp_path, overrides):
+    """Test that files missing a required field or a valid filing date are skipped."""
+    file_path = tmp_path / 'incomplete.json'
+    file_path.write_text(json.dumps({**SAMPLE_PATENT_JSON, **overrides}))
+
+    assert await importer.process_file(file_path) is None
 
 
 @pytest.mark.asyncio
-async def test_insert_into_db_success(importer):
-    """Test successful database insertion."""
-    mock_patent = MagicMock(spec=PatentApplication)
-    with patch('scripts.hupd_importer.PatentApplication.insert', AsyncMock()) as mock_insert:
-        await Importer._insert_into_db(mock_patent)
-        mock_insert.assert_awaited_once_with(mock_patent)
+async def test_insert_batch_success(importer):
+    """Test successful bulk database insertion."""
+    mock_patent = RawBSONDocument(encode({'metadata': {'title': 'Test Patent'}}))
+    mock_collection = MagicMock()
+    mock_collection.insert_many = AsyncMock()
+    importer._collection = mock_collection
+    assert await importer._insert_batch([mock_patent, mock_patent]) == 2
+    mock_collection.insert_many.assert_awaited_once_with(
+        [mock_patent, mock_patent],
+        ordered=False,
+        bypass_document_validation=True,
+    )
+
+
+@pytest.mark.asyncio
+async def test_insert_batch_skips_duplicates(importer):
+    """Test that duplicate key errors from the bulk write are not raised."""
+    mock_patent = RawBSONDocument(encode({'metadata': {'publication_number': 'US1'}}))
+    mock_collection = MagicMock()
+    mock_collection.insert_many = AsyncMock(
+        side_effect=BulkWriteError(
+            {
+                'nInserted': 0,
+                'writeErrors': [{'index': 0, 'code': 11000, 'errmsg': 'E11000 duplicate key'}],
+            }
+        )
+    )
+    importer._collection = mock_collection
+    assert await importer._insert_batch([mock_patent]) == 0
+    mock_collection.insert_many.assert_awaited_once()
 
 
 @pytest.mark.asyncio
@@ -133,15 +210,92 @@ async def test_import_patents(importer, tmp_path):
     importer.config.importer.data_dir = str(data_dir)
 
     with (
-        patch.object(
-            Importer, 'process_file', AsyncMock(return_value=FutureResult.from_value(None))
-        ) as mock_process,
-        patch.object(
-            Importer, '_create_indexes', MagicMock(return_value=FutureResult.from_value(None))
-        ),
+        patch.object(Importer, 'process_file', AsyncMock(return_value=None)) as mock_process,
+        patch.object(Importer, '_create_write_indexes', AsyncMock()) as mock_write_indexes,
+        patch.object(Importer, '_create_read_indexes', AsyncMock()) as mock_read_indexes,
     ):
-        await importer.import_patents()
+        result = await importer.import_patents()
+        result.unwrap()
         assert mock_process.call_count == 3
+        mock_write_indexes.assert_awaited_once()
+        mock_read_indexes.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_import_patents_default_workers(importer):
+    """Test that the import runs in process unless workers are configured."""
+    importer.config = OmegaConf.merge(SAMPLE_CONFIG, {'importer': {'workers': None}})
+    with (
+        patch.object(Importer, '_import_files', AsyncMock(return_value=(0, 0))) as mock_files,
+        patch.object(Importer, '_import_sharded', AsyncMock()) as mock_sharded,
+        patch.object(Importer, '_create_write_indexes', AsyncMock()),
+        patch.object(Importer, '_create_read_indexes', AsyncMock()),
+    ):
+        (await importer.import_patents()).unwrap()
+        mock_files.assert_awaited_once()
+        mock_sharded.assert_not_awaited()
+
+
+def _import_shard_or_fail(config, shard, num_shards):
+    """Stand-in for _import_shard where shard 1 crashes."""
+    if shard == 1:
+        raise RuntimeError('shard 1 crashed')
+    return 2, 1
+
+
+@pytest.mark.asyncio
+async def test_import_patents_shard_failure(importer):
+    """Test that the other shards finish and query indexes are built when a shard fails."""
+    importer.config = OmegaConf.merge(SAMPLE_CONFIG, {'importer': {'workers': 3}})
+    with (
+        patch('scripts.hupd_importer._import_shard', _import_shard_or_fail),
+        patch(
+            'scripts.hupd_importer.ProcessPoolExecutor',
+            lambda workers, **_: ThreadPoolExecutor(workers),
+        ),
+        patch.object(Importer, '_create_write_indexes', AsyncMock()),
+        patch.object(Importer, '_create_read_indexes', AsyncMock()) as mock_read_indexes,
+    ):
+        result = await importer.import_patents()
+        mock_read_indexes.assert_awaited_once()
+    error = unsafe_perform_io(result.failure())
+    assert isinstance(error, ExceptionGroup)
+    assert [str(e) for e in error.exceptions] == ['shard 1 crashed']
+
+
+def test_iter_json_files_shards(tmp_path):
+    """Test that shards partition the JSON files of the data directory."""
+    for i in range(5):
+        (tmp_path / f'patent_{i}.json').write_text('{}')
+    (tmp_path / 'notes.txt').write_text('')
+
+    shards = [set(_iter_json_files(str(tmp_path), shard, 2)) for shard in range(2)]
+    assert shards[0].isdisjoint(shards[1])
+    assert shards[0] | shards[1] == set(tmp_path.glob('*.json'))
+
+
+@pytest.mark.asyncio
+async def test_create_read_indexes(importer):
+    """Test that query indexes are built with a single create_indexes command."""
+    mock_collection = MagicMock()
+    mock_collection.create_indexes = AsyncMock()
+    importer._collection = mock_collection
+    await importer._create_read_indexes()
+    mock_collection.create_indexes.assert_awaited_once()
+    indexes = mock_collection.create_indexes.call_args.args[0]
+    assert len(indexes) == len(PatentApplication.Settings.indexes) - len(WRITE_INDEXES)
+    assert not any(index in indexes for index in WRITE_INDEXES)
+
+
+@pytest.mark.asyncio
+async def test_create_write_indexes(importer):
+    """Test that the unique indexes are built from their declaration before the import."""
+    mock_collection = MagicMock()
+    mock_collection.create_indexes = AsyncMock()
+    importer._collection = mock_collection
+    await importer._create_write_indexes()
+    mock_collection.create_indexes.assert_awaited_once_with(list(WRITE_INDEXES))
+    assert all(index in PatentApplication.Settings.indexes for index in WRITE_INDEXES)
 
 
 @pytest.mark.asyncio
@@ -154,3 +308,4 @@ async def test_main_execution(mock_config, monkeypatch):
     await main()
     assert mock_importer.init_db.called
     assert mock_importer.import_patents.await_count == 1
+
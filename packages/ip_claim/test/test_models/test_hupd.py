@@ -0,0 +1,114 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from pymongo.errors import BulkWriteError
+
+from models.hupd import PatentApplication, insert_unordered
+
+
+class UniqueCollection:
+    """In-memory collection enforcing a unique publication number, like the real index."""
+
+    def __init__(self):
+        self.publication_numbers: set[str] = set()
+        self.insert_many = AsyncMock(side_effect=self._insert_many)
+
+    async def _insert_many(self, documents: list[dict], **_) -> MagicMock:
+        inserted, errors = [], []
+        for index, document in enumerate(documents):
+            publication_number = document['metadata']['publication_number']
+            if publication_number in self.publication_numbers:
+                errors.append({'index': index, 'code': 11000, 'errmsg': 'E11000 duplicate key'})
+            else:
+                self.publication_numbers.add(publication_number)
+                inserted.append(index)
+        if errors:
+            raise BulkWriteError({'nInserted': len(inserted), 'writeErrors': errors})
+        return MagicMock(inserted_ids=inserted)
+
+
+@pytest.fixture
+def collection():
+    """Patch the PatentApplication collection with a UniqueCollection."""
+    unique_collection = UniqueCollection()
+    with patch.object(PatentApplication, 'get_motor_collection', return_value=unique_collection):
+        yield unique_collection
+
+
+def make_applications(count: int, start: int = 0) -> list[PatentApplication]:
+    """Build patent applications with distinct application and publication numbers."""
+    return [
+        PatentApplication.model_validate(
+            {
+                'metadata': {
+                    'application_number': str(i),
+                    'publication_number': f'US{i}A1',
+                    'patent_number': 'None',
+                    'title': 'Test Patent',
+                    'decision': 'PENDING',
+                },
+                'dates': {'filing_date': '20140326'},
+                'classification': {},
+                'examiner': {
+                    'examiner_id': '75147.0',
+                    'examiner_name_last': 'SMITH',
+                    'examiner_name_first': 'JOHN',
+                },
+                'inventor_list': [{'inventor_name_last': 'Doe', 'inventor_name_first': 'Jane'}],
+                'content': {
+                    'abstract': 'Test abstract',
+                    'claims': 'Test claims',
+                    'background': 'Test background',
+                    'summary': 'Test summary',
+                    'full_description': 'Test description',
+                },
+            }
+        )
+        for i in range(start, start + count)
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(('count', 'calls'), [(0, 0), (2, 1), (3, 2), (4, 2)])
+async def test_bulk_insert_batches(collection, count, calls):
+    """Test that bulk_insert sends one insert_many per full or partial batch."""
+    assert await PatentApplication.bulk_insert(make_applications(count), batch_size=2) == count
+    assert collection.insert_many.await_count == calls
+    sent = [len(call.args[0]) for call in collection.insert_many.await_args_list]
+    assert sent == [2] * (count // 2) + [1] * (count % 2)
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_skips_duplicates(collection):
+    """Test that existing applications are skipped without stopping the following batches."""
+    assert await PatentApplication.bulk_insert(make_applications(2), batch_size=2) == 2
+    # US1 is a duplicate, the rest of its batch and the next batch are still inserted
+    documents = make_applications(3, start=1)
+    assert await PatentApplication.bulk_insert(documents, batch_size=2) == 2
+    assert collection.publication_numbers == {f'US{i}A1' for i in range(4)}
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_raises_other_errors(collection):
+    """Test that write errors other than duplicate keys are raised."""
+    collection.insert_many.side_effect = BulkWriteError(
+        {'nInserted': 0, 'writeErrors': [{'index': 0, 'code': 121, 'errmsg': 'invalid'}]}
+    )
+    with pytest.raises(BulkWriteError) as exc_info:
+        await PatentApplication.bulk_insert(make_applications(1))
+    assert exc_info.value.details['writeErrors'][0]['code'] == 121
+
+
+@pytest.mark.asyncio
+async def test_insert_unordered_splits_errors():
+    """Test that duplicate key errors are told apart from the other write errors."""
+    duplicate = {'index': 0, 'code': 11000, 'errmsg': 'E11000 duplicate key'}
+    invalid = {'index': 2, 'code': 121, 'errmsg': 'invalid'}
+    collection = MagicMock()
+    collection.insert_many = AsyncMock(
+        side_effect=BulkWriteError({'nInserted': 1, 'writeErrors': [duplicate, invalid]})
+    )
+    assert await insert_unordered(collection, [{}, {}, {}]) == (1, [duplicate], [invalid])
+    collection.insert_many.assert_awaited_once_with(
+        [{}, {}, {}], ordered=False, bypass_document_validation=True
+    )
@@ -0,0 +1,161 @@
+import orjson
+import pytest
+from langchain_core.documents import Document as LangChainDocument
+from langchain_text_splitters import SentenceTransformersTokenTextSplitter, TextSplitter
+
+from utils.chunker import PatentChunker, PatentChunkerConfig
+from utils.loader import _dump_page_content
+
+CLAIMS = 'What is claimed is:\n1. A device comprising a sensor.\n2. The device of claim 1, wherein.'
+
+SECTIONS = {'Title': 'Test Patent', 'Claims': '1. A device.'}
+
+
+class WordTokenizer:
+    """Whitespace tokenizer wrapping the ids in start and stop tokens, like a transformers one."""
+
+    def __init__(self):
+        self.words = ['[CLS]', '[SEP]']
+        self.batches = 0
+
+    def _ids(self, text):
+        ids = []
+        for word in text.split():
+            if word not in self.words:
+                self.words.append(word)
+            ids.append(self.words.index(word))
+        return ids
+
+    def encode(self, text, **_):
+        return [0, *self._ids(text), 1]
+
+    def decode(self, ids):
+        return ' '.join(self.words[i] for i in ids)
+
+    def __call__(self, texts, *, add_special_tokens=True, **_):
+        self.batches += 1
+        input_ids = [self._ids(text) for text in texts]
+        if add_special_tokens:
+            input_ids = [[0, *ids, 1] for ids in input_ids]
+        return {'input_ids': input_ids}
+
+
+@pytest.fixture
+def token_chunker():
+    """Chunker with a sentence transformers splitter over a WordTokenizer, no model loaded."""
+    splitter = SentenceTransformersTokenTextSplitter.__new__(SentenceTransformersTokenTextSplitter)
+    TextSplitter.__init__(splitter, chunk_overlap=2)
+    splitter.tokenizer = WordTokenizer()
+    splitter.tokens_per_chunk = 5
+    chunker = PatentChunker(
+        PatentChunkerConfig(splitter_type='recursive', chunk_size=5, chunk_overlap=2)
+    )
+    chunker.splitter = splitter
+    return chunker
+
+
+@pytest.fixture
+def chunker():
+    """Chunker splitting the other sections with the character splitter."""
+    return PatentChunker(
+        PatentChunkerConfig(splitter_type='recursive', chunk_size=50, chunk_overlap=10)
+    )
+
+
+@pytest.fixture
+def document():
+    """Document with the page content built by the loader."""
+    page_content = _dump_page_content({
+        'Title': 'Test Patent',
+        'Abstract': 'Test abstract',
+        'Claims': CLAIMS,
+        'Background': '',
+        'Summary': 'Test summary',
+        'Description': 'Test description',
+    })
+    return LangChainDocument(page_content=page_content, metadata={'application_number': '1'})
+
+
+def test_chunk_claims_from_loader(chunker, document):
+    """Test that the loader's Claims section is split claim by claim, keeping the preamble."""
+    claims = [
+        chunk for chunk in chunker.chunk_document(document) if chunk.metadata['section'] == 'Claims'
+    ]
+    assert [chunk.page_content for chunk in claims] == [
+        'What is claimed is:',
+        '1. A device comprising a sensor.',
+        '2. The device of claim 1, wherein.',
+    ]
+    assert [chunk.metadata.get('claim_number') for chunk in claims] == [None, 1, 2]
+    assert all(chunk.metadata['total_chunks'] == 3 for chunk in claims)
+    assert all(chunk.metadata['application_number'] == '1' for chunk in claims)
+
+
+def test_chunk_claims_without_numbers(chunker, document):
+    """Test that claim numbers are left out of the metadata when not preserved."""
+    chunker.config.preserve_claim_numbers = False
+    chunks = chunker.chunk_document(document)
+    assert all('claim_number' not in chunk.metadata for chunk in chunks)
+
+
+def test_chunk_document_skips_empty_sections(chunker, document):
+    """Test that every non-empty section is chunked in page content order."""
+    sections = list(
+        dict.fromkeys(chunk.metadata['section'] for chunk in chunker.chunk_document(document))
+    )
+    assert sections == ['Title', 'Abstract', 'Claims', 'Summary', 'Description']
+
+
+def test_split_on_tokens_matches_split_text(token_chunker):
+    """Test that the batched token splits are the splits of each text on its own."""
+    splitter = token_chunker.splitter
+    texts = [
+        'one two three four five six seven',
+        'eight nine',
+        'one two three four five six seven eight nine ten eleven',
+    ]
+    splits = token_chunker._split_on_tokens(splitter, texts)
+    assert splits == {text: splitter.split_text(text) for text in texts}
+    assert len(splits[texts[2]]) == 3
+
+
+def test_chunk_documents_tokenizes_once(token_chunker):
+    """Test that chunk_documents tokenizes the non-claims sections of all documents at once."""
+    documents = [
+        LangChainDocument(
+            page_content=_dump_page_content({
+                'Title': f'Patent {i}',
+                'Abstract': 'a b c d e f g h',
+                'Claims': '1. A device.',
+            }),
+            metadata={'application_number': str(i)},
+        )
+        for i in range(2)
+    ]
+    chunks = token_chunker.chunk_documents(documents)
+    assert token_chunker.splitter.tokenizer.batches == 1
+    assert chunks == [chunk for doc in documents for chunk in token_chunker.chunk_document(doc)]
+
+
+@pytest.mark.parametrize(
+    ('page_content', 'expected'),
+    [
+        (orjson.dumps(SECTIONS).decode(), SECTIONS),
+        (str(SECTIONS), SECTIONS),
+        ('Plain text, no sections.', None),
+        ('[1, 2]', None),
+    ],
+    ids=['json', 'python_literal', 'text', 'not_a_dict'],
+)
+def test_parse_content(page_content, expected):
+    """Test that page content is parsed as JSON, then as a Python literal, or not at all."""
+    document = LangChainDocument(page_content=page_content)
+    assert PatentChunker._parse_content(document) == expected
+
+
+def test_chunk_document_unstructured(chunker):
+    """Test that page content without sections is split as plain text."""
+    document = LangChainDocument(page_content='Plain text, no sections.', metadata={'id': 1})
+    chunks = chunker.chunk_document(document)
+    assert [chunk.page_content for chunk in chunks] == ['Plain text, no sections.']
+    assert chunks[0].metadata == {'id': 1}
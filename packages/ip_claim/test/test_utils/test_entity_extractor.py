@@ -1,6 +1,6 @@
 import pytest
 
-from utils.entity_extractor import extract_entities
+from utils.entity_extractor import _next_boundary, _sentence_boundaries, extract_entities
 
 
 @pytest.fixture(scope='module')
@@ -162,3 +162,45 @@ def test_coref_label_consistency():
     assert len(jeff) > 0
     assert len(he) > 0
     assert jeff[0][1] == he[0][1] == 'PERSON'
+
+
+def _chunk_ends(text, chunk_size):
+    """Chunk end offsets of a text, as computed by extract_entities."""
+    boundaries = _sentence_boundaries(text)
+    ends = [0]
+    while ends[-1] < len(text):
+        ends.append(_next_boundary(boundaries, ends[-1], chunk_size, len(text)))
+    return ends[1:]
+
+
+def test_sentence_boundaries():
+    """Test that boundaries fall right after sentence ends and section breaks"""
+    text = 'One. Two?\tThree\n\nFour 3.5 five!'
+    # Decimal points are not sentence ends, the final one ends with the text
+    assert _sentence_boundaries(text).tolist() == [5, 10, 17, len(text)]
+
+
+def test_sentence_boundaries_without_punctuation():
+    """Test that text without sentence ends has no boundaries and is split at chunk_size"""
+    text = 'no terminal punctuation here at all'
+    assert _sentence_boundaries(text).size == 0
+    assert _chunk_ends(text, 10) == [10, 20, 30, len(text)]
+
+
+def test_next_boundary_exact_end():
+    """Test that a chunk ending exactly on a boundary ends there"""
+    text = 'Aaaa bbb. Cccc ddd. Eeee.'
+    boundaries = _sentence_boundaries(text)
+    assert _next_boundary(boundaries, 0, 10, len(text)) == 10
+    assert _chunk_ends(text, 10) == [10, 20, len(text)]
+
+
+def test_next_boundary_backs_off_to_last_boundary():
+    """Test that a chunk ends at the last boundary before chunk_size"""
+    text = 'Short. A much longer sentence follows here.'
+    boundaries = _sentence_boundaries(text)
+    assert _next_boundary(boundaries, 0, 20, len(text)) == 7
+    # No boundary after the chunk start, the chunk is cut at chunk_size
+    assert _next_boundary(boundaries, 7, 20, len(text)) == 27
+    # The last chunk ends with the text
+    assert _next_boundary(boundaries, 27, 20, len(text)) == len(text)
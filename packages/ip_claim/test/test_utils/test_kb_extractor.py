@@ -0,0 +1,99 @@
+import threading
+import time
+
+import orjson
+import polars as pl
+import pytest
+
+from utils.kb_extractor import (
+    KGBuilder,
+    _next_boundary,
+    _parse_relations,
+    _sentence_boundaries,
+    entities_frame,
+)
+
+RELATIONS = {'relations': [{'e_1': 'sensor', 'rel': 'component_of', 'e_2': 'device'}]}
+
+
+class StubBuilder(KGBuilder):
+    """Builder echoing each text after a delay, tracking how many calls run at once"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.running = 0
+        self.max_running = 0
+
+    def __call__(self, text):
+        with self._lock:
+            self.running += 1
+            self.max_running = max(self.max_running, self.running)
+        # Later texts finish first, so results in input order are not completion order
+        time.sleep(0.05 / (1 + int(text)))
+        with self._lock:
+            self.running -= 1
+        return {'relations': [{'e_1': text, 'rel': 'echo', 'e_2': text}]}
+
+
+def test_sentence_boundaries_on_line_breaks():
+    """Test that single line breaks are boundaries as well as sentence ends"""
+    text = 'A claim\nanother claim. Done'
+    assert _sentence_boundaries(text).tolist() == [8, 23]
+
+
+def test_next_boundary_without_punctuation():
+    """Test that text without boundaries is cut at chunk_size"""
+    text = 'x' * 25
+    boundaries = _sentence_boundaries(text)
+    assert boundaries.size == 0
+    assert _next_boundary(boundaries, 0, 10, len(text)) == 10
+    assert _next_boundary(boundaries, 20, 10, len(text)) == len(text)
+
+
+def test_next_boundary_exact_end():
+    """Test that a chunk ending exactly on a boundary ends there"""
+    text = 'Aaaaaaaa.\nBbbbbbbbb.'
+    boundaries = _sentence_boundaries(text)
+    assert _next_boundary(boundaries, 0, 10, len(text)) == 10
+    # A boundary at the chunk start does not produce an empty chunk
+    assert _next_boundary(boundaries, 10, 5, len(text)) == 15
+
+
+@pytest.mark.asyncio
+async def test_abatch_order_and_concurrency():
+    """Test that abatch keeps the input order and runs at most max_inflight texts at once"""
+    builder = StubBuilder()
+    texts = [str(i) for i in range(10)]
+    results = await builder.abatch(texts, max_inflight=3)
+    assert [result['relations'][0]['e_1'] for result in results] == texts
+    assert 1 < builder.max_running <= 3
+    assert builder.running == 0
+
+
+@pytest.mark.parametrize(
+    ('output', 'expected'),
+    [
+        (RELATIONS, RELATIONS),
+        (f'```json\n{orjson.dumps(RELATIONS).decode()}\n```', RELATIONS),
+        ('{"relations": []}', {'relations': []}),
+        ('The sensor is a component of the device.', {'relations': []}),
+        ('["sensor", "device"]', {'relations': []}),
+    ],
+    ids=['dict', 'fenced_json', 'json', 'invalid_json', 'not_an_object'],
+)
+def test_parse_relations(output, expected):
+    """Test that relation outputs are passed through, parsed, or replaced by empty relations"""
+    assert _parse_relations(output) == expected
+
+
+@pytest.mark.parametrize(
+    'entities',
+    [[('Apple Inc.', 'ORG', 0, 10), ('Cupertino', 'GPE', 25, 34), ('Apple', 'ORG', 40, 45)], []],
+    ids=['entities', 'empty'],
+)
+def test_entities_frame(entities):
+    """Test that entity tuples become text, categorical label and Int32 offset columns"""
+    frame = entities_frame(entities)
+    assert frame.columns == ['text', 'label', 'start_char', 'end_char']
+    assert frame.dtypes == [pl.String, pl.Categorical, pl.Int32, pl.Int32]
+    assert frame.rows() == entities
@@ -0,0 +1,170 @@
+from datetime import datetime
+from unittest.mock import MagicMock, patch
+
+import orjson
+import pytest
+from langchain_core.documents import Document as LangChainDocument
+
+from utils.loader import PAGE_CONTENT_FIELDS, PatentConverter, _get_pool
+
+RAW_PATENTS = [
+    {
+        'metadata': {
+            'application_number': f'1411271{i}',
+            'publication_number': f'US2014022186{i}A1-20140807',
+            'patent_number': 'None',
+            'title': f'Test Patent {i}',
+            'decision': 'PENDING',
+        },
+        'dates': {
+            'filing_date': datetime(2014, 3, 26),
+            'patent_issue_date': None,
+            'abandon_date': datetime(2016, 1, i + 1) if i % 2 else None,
+        },
+        'classification': {
+            'main_cpc_label': 'A61B5128',
+            'cpc_labels': ['A61B5128', 'A61B50059'],
+            'main_ipcr_label': None,
+            'ipcr_labels': None,
+            'uspc_class': '600',
+            'uspc_subclass': '558000',
+        },
+        'examiner': {
+            'examiner_id': '75147.0',
+            'examiner_name_first': 'JOHN',
+            'examiner_name_last': 'SMITH',
+        },
+        'inventor_list': [{'inventor_country': 'US'}] * (i % 3),
+        'content': {
+            'abstract': f'Test abstract {i}',
+            'claims': '1. A claim.\n2. The claim of 1.',
+            'background': 'Test "background"',
+            'summary': 'Test summary',
+            'full_description': 'Test description é',
+        },
+    }
+    for i in range(7)
+]
+
+
+class Cursor:
+    """Async cursor over in-memory raw documents."""
+
+    def __init__(self, documents: list[dict]):
+        self._documents = iter(documents)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> dict:
+        try:
+            return next(self._documents)
+        except StopIteration:
+            raise StopAsyncIteration from None
+
+
+def _aggregated(raw: dict) -> dict:
+    """Shape a raw document like the output of the batch_convert_aggregated pipeline."""
+    document = {key: value for key, value in raw.items() if key != 'content'}
+    content = raw['content']
+    document['_page_content'] = {
+        'Title': raw['metadata']['title'],
+        'Abstract': content['abstract'],
+        'Claims': content['claims'],
+        'Background': content['background'],
+        'Summary': content['summary'],
+        'Description': content['full_description'],
+    }
+    return document
+
+
+@pytest.fixture(params=[False, True], ids=['unvalidated', 'validated'])
+def validate(request, monkeypatch):
+    """Run each test with and without validation through the LangChain models."""
+    monkeypatch.setattr(PatentConverter, 'validate', request.param)
+    return request.param
+
+
+@pytest.fixture
+def collection():
+    """Patch the Motor collection to serve RAW_PATENTS."""
+    mock_collection = MagicMock()
+    mock_collection.find.side_effect = lambda *_, **__: Cursor(RAW_PATENTS)
+    mock_collection.aggregate.side_effect = lambda *_, **__: Cursor(
+        [_aggregated(raw) for raw in RAW_PATENTS]
+    )
+    with patch('utils.loader.PatentApplication.get_motor_collection', return_value=mock_collection):
+        yield mock_collection
+
+
+@pytest.fixture
+def expected():
+    """Documents converted in process, batched like batch_convert with batch_size=3."""
+    documents = [PatentConverter.convert_document_raw(raw) for raw in RAW_PATENTS]
+    return [documents[i : i + 3] for i in range(0, len(documents), 3)]
+
+
+@pytest.mark.asyncio
+async def test_batch_convert(validate, collection, expected):
+    """Test that the process pool converts the same documents as the in-process conversion."""
+    batches = [batch async for batch in PatentConverter.batch_convert(batch_size=3)]
+    assert batches == expected
+    assert batches[0][0].metadata['filing_year'] == 2014
+    assert orjson.loads(batches[0][0].page_content)['Title'] == 'Test Patent 0'
+    collection.find.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_batch_convert_aggregated(validate, collection, expected):
+    """Test that MongoDB-assembled page content converts to the same documents."""
+    batches = [batch async for batch in PatentConverter.batch_convert_aggregated(batch_size=3)]
+    assert batches == expected
+    pipeline = collection.aggregate.call_args.args[0]
+    assert pipeline[-1]['$project']['_page_content'] == PAGE_CONTENT_FIELDS
+
+
+@pytest.mark.asyncio
+async def test_batch_convert_serialized(validate, collection, expected):
+    """Test that the serialized batches load back into the documents of batch_convert."""
+    batches = [
+        [LangChainDocument(**document) for document in orjson.loads(batch)]
+        async for batch in PatentConverter.batch_convert_serialized(batch_size=3)
+    ]
+    assert batches == expected
+
+
+@pytest.mark.asyncio
+async def test_batch_convert_prefetch(validate, collection, expected):
+    """Test that converting ahead of the consumer yields the documents of batch_convert."""
+    batches = [batch async for batch in PatentConverter.batch_convert_prefetch(batch_size=3)]
+    assert batches == expected
+
+
+@pytest.mark.asyncio
+async def test_batch_convert_query(collection):
+    """Test that a Beanie query is translated to the raw cursor arguments."""
+    query = MagicMock(sort_expressions=[('dates.filing_date', 1)], skip_number=2, limit_number=5)
+    query.get_filter_query.return_value = {'metadata.decision': 'PENDING'}
+    async for _ in PatentConverter.batch_convert(query, batch_size=3):
+        pass
+    args, kwargs = collection.find.call_args
+    assert args[0] == {'metadata.decision': 'PENDING'}
+    assert kwargs == {
+        'sort': [('dates.filing_date', 1)],
+        'skip': 2,
+        'limit': 5,
+        'batch_size': 3,
+    }
+
+
+def test_get_pool_is_shared():
+    """Test that a single process pool is reused across conversions."""
+    assert _get_pool() is _get_pool()
+
+
+def test_get_pool_is_shut_down_at_exit():
+    """Test that the process pool is registered for shutdown at interpreter exit."""
+    with patch('utils.loader.atexit.register') as register:
+        pool = _get_pool.__wrapped__()
+    register.assert_called_once_with(pool.shutdown)
+    pool.shutdown()
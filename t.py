@@ -1,18 +1,47 @@
+from pathlib import Path
 from pprint import pp
 
 import polars as pl
 
-df = pl.read_csv_batched(
-    source='./data/g_us_patent_citation.tsv',
-    has_header=True,
-    separator='\t',
-    infer_schema_length=10_000,
-)
-_df: pl.DataFrame = pl.concat(df.next_batches(10))
+# Columns of the PatentsView g_us_patent_citation table, in file order
+SCHEMA = {
+    'patent_id': pl.String,
+    'citation_sequence': pl.Int32,
+    'citation_patent_id': pl.String,
+    'citation_date': pl.Date,
+    'record_name': pl.String,
+    'wipo_kind': pl.String,
+    'citation_category': pl.String,
+}
+# Columns used downstream, the scan skips parsing the others
+COLUMNS = ['patent_id', 'citation_patent_id', 'citation_date']
 
+CSV_PATH = Path('./data/g_us_patent_citation.tsv')
+# Columnar copy of the TSV, written once so later runs skip parsing it
+PARQUET_PATH = CSV_PATH.with_suffix('.parquet')
 
-pp(
-    _df.with_columns(citation_date=pl.col('citation_date').cast(pl.Date)).filter(
-        pl.col('citation_date') > pl.date(2017, 12, 30)
+if not PARQUET_PATH.exists():
+    # Only a completed sink is moved into place, an interrupted run leaves no cache behind
+    partial_path = PARQUET_PATH.with_suffix('.tmp')
+    pl.scan_csv(
+        CSV_PATH,
+        has_header=True,
+        separator='\t',
+        schema=SCHEMA,
+    ).sink_parquet(
+        partial_path,
+        compression='zstd',
+        row_group_size=500_000,
+        statistics=True,
     )
+    partial_path.rename(PARQUET_PATH)
+
+# Row group statistics let the date filter skip groups without decoding them
+df = (
+    pl.scan_parquet(PARQUET_PATH)
+    .select(COLUMNS)
+    .filter(pl.col('citation_date') > pl.date(2017, 12, 30))
+    .collect(engine='streaming')
 )
+
+pp(df)
@@ -5,7 +5,6 @@ from functools import reduce
 from pathlib import Path
 from pprint import pp
 
-import aiofiles
 from beanie import init_beanie
 from loguru import logger
 from motor.motor_asyncio import AsyncIOMotorClient